@@ -1,6 +1,4 @@
-import re
 import streamlit as st
-import json
 import pandas as pd
 import plotly.graph_objects as go
 from datetime import datetime, timedelta, date
@@ -8,6 +6,9 @@ from pathlib import Path
 from collections import Counter
 import calendar
 
+import build_data
+from safety_data import YARD_ORDER, Dataset
+
 # ── Page config ───────────────────────────────────────────────────────
 
 st.set_page_config(
@@ -29,34 +30,6 @@ YELLOW = "#d97706"
 GRAY = "#64748b"
 DARK_GREEN = "#047857"
 
-# ── Yard definitions ─────────────────────────────────────────────────
-
-YARD_ORDER = ["Midland", "Bryan", "Kilgore", "Hobbs",
-              "Jourdanton", "Levelland", "Barstow"]
-
-YARD_REGIONS = {
-    "Midland":    ["midland", "yukon", "odessa", "west odessa", "stanton",
-                   "big spring", "garden city", "crane", "rankin", "mccamey"],
-    "Bryan":      ["bryan", "college station", "palestine", "madisonville",
-                   "hearne", "navasota", "huntsville"],
-    "Kilgore":    ["kilgore", "tyler", "longview", "henderson", "marshall",
-                   "jacksonville", "carthage", "lufkin", "nacogdoches"],
-    "Hobbs":      ["hobbs", "seminole", "lovington", "carlsbad", "artesia",
-                   "eunice", "jal", "tatum"],
-    "Jourdanton": ["jourdanton", "pleasanton", "floresville", "poteet",
-                   "kenedy", "karnes city", "falls city", "laredo",
-                   "edinburg"],
-    "Levelland":  ["levelland", "lubbock", "brownfield", "post", "lamesa",
-                   "snyder", "tahoka", "slaton", "wolfforth", "littlefield"],
-    "Barstow":    ["barstow", "pecos", "kermit", "monahans", "fort stockton",
-                   "wink", "mentone", "toyah"],
-}
-
-DISTRICT_ALIASES = {"midland yukon": "Midland"}
-CASING_SERVICE_LINES = {"casing"}
-
-CSG_AUDIT_FORM = "CSG - Safety Casing Field Assessment"
-
 # ── Custom CSS ────────────────────────────────────────────────────────
 
 st.markdown("""
@@ -151,78 +124,101 @@ st.markdown("""
 
 
 # =====================================================================
-#  HELPER FUNCTIONS
+#  DATA LOADING
 # =====================================================================
 
-def is_casing_vehicle(vehicle_number):
-    """Return True if the vehicle belongs to the Casing division."""
-    if not vehicle_number:
-        return False
-    vn = vehicle_number.strip()
-    if "-RAT-" in vn:
-        return True
-    if re.match(r"^\d+C(\s|$|-)", vn):
-        return True
-    return False
-
-
-def location_to_yard(loc_str):
-    """Map a Motive location string to the nearest casing yard."""
-    if not loc_str:
-        return None
-    low = loc_str.lower()
-    for yard, keywords in YARD_REGIONS.items():
-        if any(kw in low for kw in keywords):
-            return yard
-    return None
-
-
-def normalize_district(raw_district):
-    """Combine Midland Yukon / Midland PER into Midland."""
-    if not raw_district:
-        return raw_district
-    key = raw_district.strip().lower()
-    return DISTRICT_ALIASES.get(key, raw_district.strip())
-
-
-def parse_event_date(date_str):
-    """Parse date from various formats. Returns date object or None."""
-    if not date_str:
-        return None
-    try:
-        return datetime.fromisoformat(date_str.replace("Z", "+00:00")).date()
-    except Exception:
-        pass
-    try:
-        return datetime.strptime(date_str[:10], "%Y-%m-%d").date()
-    except Exception:
-        pass
-    return None
+@st.cache_resource(max_entries=1)
+def load_data(fingerprint):
+    """Normalized Casing Division tables (see build_data.py).
 
+    One frozen Dataset per data fingerprint, shared by every session
+    without copying; reruns reuse it until a fetch changes the data.
+    """
+    return Dataset.from_tables(build_data.load_tables(DATA_DIR))
+
+
+@st.cache_resource(max_entries=64)
+def filter_data(_dataset, data_version, start_date, end_date, yard):
+    """The display lists and Motive aggregates for one filter choice.
+
+    Shared by every session, least recently used evicted first, so the
+    next viewer of the same yard and period gets them without work.
+    ``yard`` is a yard name or None for all yards.
+    """
+    counts = _dataset.counts
+    return {
+        "motive": _dataset.motive.between(start_date, end_date, yard),
+        "incidents": _dataset.incidents.between(start_date, end_date, yard),
+        "observations": _dataset.observations.between(
+            start_date, end_date, yard),
+        "audits": _dataset.audits.between(start_date, end_date, yard),
+        "by_type": counts.counts("motive", start_date, end_date, yard),
+        "by_day": counts.by_day("motive", start_date, end_date, yard),
+        "by_yard": counts.by_yard(
+            "motive", start_date, end_date,
+            YARD_ORDER if yard is None else [yard]),
+        "drivers": counts.counts("drivers", start_date, end_date, yard),
+    }
+
+
+@st.cache_resource(max_entries=256)
+def cached_figure(view, chart, data_version, filters, _build):
+    """A Plotly figure shared by every session, least recently used
+    evicted first; _build() only runs on a miss.
+
+    This saves building and validating the go.Figure; st.plotly_chart
+    still serializes it on each render, as it has no way to take a
+    pre-serialized spec.
+    """
+    return _build()
+
+
+@st.cache_resource(max_entries=512)
+def audit_gauge(score, rig):
+    """Rig audit score gauge. It depends only on (score, rig), so it has
+    its own cache and never evicts the view charts."""
+    score_color = GREEN if score >= 90 else YELLOW if score >= 75 else RED
+    fig = go.Figure(go.Indicator(
+        mode="gauge+number",
+        value=score,
+        number={"suffix": "%"},
+        gauge={
+            "axis": {"range": [0, 100]},
+            "bar": {"color": score_color},
+            "steps": [
+                {"range": [0, 75], "color": "#fee2e2"},
+                {"range": [75, 90], "color": "#fef3c7"},
+                {"range": [90, 100], "color": "#d1fae5"},
+            ],
+            "threshold": {
+                "line": {"color": DARK, "width": 2},
+                "thickness": 0.75, "value": 90,
+            },
+        },
+        title={"text": f"Audit Score --- {rig}"},
+    ))
+    fig.update_layout(
+        height=220,
+        margin=dict(l=30, r=30, t=60, b=20))
+    return fig
 
-# =====================================================================
-#  DATA LOADING
-# =====================================================================
 
-@st.cache_data(ttl=300)
-def load_json(filename):
-    path = DATA_DIR / filename
-    if path.exists():
-        with open(path) as f:
-            return json.load(f)
-    return None
+@st.cache_resource
+def data_watcher():
+    """One DataWatcher for the process; its version keys every cache."""
+    return build_data.DataWatcher(DATA_DIR)
 
 
-motive_raw = load_json("motive_events.json")
-incidents_raw = load_json("kpa_incidents.json")
-observations_raw = load_json("kpa_observations.json")
+data_version = data_watcher().version
+dataset = load_data(data_version)
+all_motive = dataset.motive
+all_incidents = dataset.incidents
+all_observations = dataset.observations
+all_audits = dataset.audits
+counts = dataset.counts
 
 # Fetch timestamp
-fetched_raw = ""
-for raw in [motive_raw, incidents_raw, observations_raw]:
-    if raw and raw.get("fetched_at"):
-        fetched_raw = raw["fetched_at"]
-        break
+fetched_raw = dataset.fetched_at
 try:
     fetched_dt = datetime.fromisoformat(fetched_raw)
     fetched_str = fetched_dt.strftime("%b %d, %Y at %I:%M %p")
@@ -230,122 +226,111 @@ except Exception:
     fetched_str = fetched_raw or "---"
 
 
+def shown(value, default="---"):
+    """Display an optional KPA field; default only if the report lacks it."""
+    return default if value is None else value
+
+
 # =====================================================================
-#  BUILD FLAT EVENT LISTS (filtered to Casing Division)
+#  DETAIL TABLES (paged server-side)
 # =====================================================================
 
-def get_all_motive_events():
-    """Parse all Casing Division motive events into flat dicts."""
-    if not motive_raw:
-        return []
-    events = []
-    for entry in motive_raw.get("events", []):
-        evt = entry.get("driver_performance_event", entry)
-        veh = evt.get("vehicle") or {}
-        if not is_casing_vehicle(veh.get("number", "")):
-            continue
-        drv = evt.get("driver") or {}
-        driver_name = ""
-        if drv.get("first_name"):
-            driver_name = f"{drv['first_name']} {drv.get('last_name', '')}".strip()
-        events.append({
-            "id": evt.get("id", ""),
-            "type": evt.get("type", "unknown"),
-            "date": parse_event_date(evt.get("start_time", "")),
-            "date_str": (evt.get("start_time") or "")[:10],
-            "location": evt.get("location", ""),
-            "yard": location_to_yard(evt.get("location", "")),
-            "driver": driver_name,
-            "vehicle": veh.get("number", ""),
-            "start_speed": evt.get("start_speed"),
-            "end_speed": evt.get("end_speed"),
-        })
-    return events
-
-
-def get_all_kpa_items(raw, key):
-    """Parse all Casing Division KPA items with normalized fields."""
-    if not raw:
-        return []
-    items = []
-    for item in raw.get(key, []):
-        sl = (item.get("Service Line") or item.get("service_line") or "").strip().lower()
-        if sl not in CASING_SERVICE_LINES:
-            continue
-        item["_date"] = parse_event_date(item.get("Date", ""))
-        item["_district"] = normalize_district(item.get("District", ""))
-        items.append(item)
-    return items
-
-
-def get_all_rig_audits(raw):
-    """Extract CSG - Safety Casing Field Assessment records from observations.
-
-    These have an empty Service Line so they're missed by the Casing filter.
-    We identify them by the Report field and compute a checklist score from
-    the Yes/OK vs No answers in the record.
+PAGE_SIZE = 50
+
+
+def speed_text(evt):
+    if not evt.start_speed:
+        return ""
+    speed = f"{evt.start_speed:.0f} mph"
+    if evt.end_speed:
+        speed += f" -> {evt.end_speed:.0f} mph"
+    return speed
+
+
+# Column label → how to show it for one record
+INCIDENT_COLUMNS = {
+    "Report #": lambda i: shown(i.report_number, ""),
+    "Type": lambda i: shown(i.incident_type),
+    "Date": lambda i: (i.timestamp or "---")[:16],
+    "District": lambda i: i.district,
+    "Employee": lambda i: shown(i.employee),
+}
+OBSERVATION_COLUMNS = {
+    "Report #": lambda i: shown(i.report_number, ""),
+    "Type": lambda i: shown(i.observation_type),
+    "Date": lambda i: (i.timestamp or "---")[:16],
+    "District": lambda i: i.district,
+    "Observer": lambda i: shown(i.observer),
+    "Description": lambda i: (i.description or "---")[:100],
+    "Location": lambda i: shown(i.location),
+}
+EVENT_COLUMNS = {
+    "Driver": lambda e: e.driver or "Unknown",
+    "Event Type": lambda e: e.type.replace("_", " ").title(),
+    "Date": lambda e: e.date_str,
+    "Vehicle": lambda e: e.vehicle,
+    "Location": lambda e: (e.location or "---")[:50],
+    "Speed": speed_text,
+    "Yard": lambda e: e.yard or "Unknown",
+}
+
+
+def paged_table(key, records, columns, hide=(), orders=None):
+    """st.dataframe of records, one PAGE_SIZE page at a time.
+
+    Sorting runs over the records themselves and only the chosen columns
+    of the page on screen are turned into rows. ``orders`` are named
+    row orders offered ahead of the per-column sorts (the first is the
+    default); without them rows keep their newest-first order.
     """
-    if not raw:
-        return []
-    PASS_VALUES = {"Yes", "OK"}
-    FAIL_VALUES = {"No"}
-    SKIP_KEYS = {
-        "Report", "Report Number", "Date", "District", "Observer",
-        "Observer Emp#", "Rig", "Audit Type", "Link", "Service Line",
-        "Updated", "Updated Time", "Version", "Latitude", "Longitude",
-        "Temperature", "Wind Speed", "Weather", "Duration (Seconds)",
-        "Parent Report Number", "Parent Link", "Surrogate", "Completed by",
-        "Customer", "Name", "Number of Crew Members Involved",
-        "Date Conducted", "Date Conducted Latitude",
-        "Date Conducted Longitude", "1st Obs", "2nd Obs",
-        "_date", "_district",
-    }
-    audits = []
-    for item in raw.get("observations", []):
-        if item.get("Report") != CSG_AUDIT_FORM:
-            continue
-
-        # Compute checklist score
-        passed = 0
-        failed = 0
-        failed_items = []
-        for k, v in item.items():
-            if k in SKIP_KEYS or not isinstance(v, str):
-                continue
-            if v in PASS_VALUES:
-                passed += 1
-            elif v in FAIL_VALUES:
-                failed += 1
-                failed_items.append(k)
-
-        total = passed + failed
-        score = round(passed / total * 100) if total > 0 else 0
-
-        item["_date"] = parse_event_date(item.get("Date", ""))
-        item["_district"] = normalize_district(item.get("District", ""))
-        item["_score"] = score
-        item["_passed"] = passed
-        item["_failed"] = failed
-        item["_total_checked"] = total
-        item["_failed_items"] = failed_items
-        audits.append(item)
-    return audits
-
-
-# Pre-parse all data
-all_motive = get_all_motive_events()
-all_incidents = get_all_kpa_items(incidents_raw, "incidents")
-all_observations = get_all_kpa_items(observations_raw, "observations")
-all_audits = get_all_rig_audits(observations_raw)
+    labels = [label for label in columns if label not in hide]
+    orders = orders or {"Newest first": None}
+
+    c_sort, c_rev, c_cols, c_page = st.columns([2, 1, 4, 1])
+    sort_by = c_sort.selectbox(
+        "Sort by", list(orders) + labels, key=f"{key}_sort")
+    reverse = c_rev.checkbox("Reverse", key=f"{key}_reverse")
+    picked = c_cols.multiselect(
+        "Columns", labels, default=labels, key=f"{key}_columns")
+    pages = max(1, -(-len(records) // PAGE_SIZE))
+    # The page count is in the key so a shorter list starts over at 1
+    page = c_page.number_input(
+        "Page", min_value=1, max_value=pages, value=1,
+        key=f"{key}_page_{pages}")
+
+    if sort_by in orders:
+        sort_key = orders[sort_by]
+    else:
+        def sort_key(record, value=columns[sort_by]):
+            v = value(record)
+            # Blanks last; numbers and text never compared to each other
+            return (v is None or v == "", isinstance(v, str), v)
+    ordered = (records if sort_key is None
+               else sorted(records, key=sort_key))
+    if reverse:
+        ordered = ordered[::-1]
+
+    start = (page - 1) * PAGE_SIZE
+    chunk = ordered[start:start + PAGE_SIZE]
+    st.dataframe(
+        pd.DataFrame([{label: columns[label](r) for label in picked}
+                      for r in chunk], columns=picked),
+        use_container_width=True, hide_index=True)
+    st.caption(f"Rows {start + 1}-{start + len(chunk)} of {len(records)}")
 
 
 # =====================================================================
 #  PREDICTIVE ALERT CALCULATION (from real data)
 # =====================================================================
 
-def calculate_predictive_alerts(motive_events, kpa_incidents):
-    """Calculate data-driven trend alerts for each yard."""
-    today = date.today()
+@st.cache_data(max_entries=2)
+def calculate_predictive_alerts(_counts, data_version, today):
+    """Calculate data-driven trend alerts for each yard.
+
+    Month totals are read off the count cube (Motive events + KPA
+    incidents per yard), and the result is cached per (data version,
+    calendar day) since it ignores the sidebar filters.
+    """
     current_month_start = today.replace(day=1)
     prev_month_end = current_month_start - timedelta(days=1)
     prev_month_start = prev_month_end.replace(day=1)
@@ -358,30 +343,12 @@ def calculate_predictive_alerts(motive_events, kpa_incidents):
 
     alerts = {}
     for yard in YARD_ORDER:
-        current_count = 0
-        prev_count = 0
-
-        for evt in motive_events:
-            if evt.get("yard") != yard:
-                continue
-            d = evt.get("date")
-            if not d:
-                continue
-            if current_month_start <= d <= today:
-                current_count += 1
-            elif prev_month_start <= d <= prev_month_end:
-                prev_count += 1
-
-        for item in kpa_incidents:
-            if item.get("_district") != yard:
-                continue
-            d = item.get("_date")
-            if not d:
-                continue
-            if current_month_start <= d <= today:
-                current_count += 1
-            elif prev_month_start <= d <= prev_month_end:
-                prev_count += 1
+        current_count = sum(
+            _counts.count(source, current_month_start, today, yard)
+            for source in ("motive", "incidents"))
+        prev_count = sum(
+            _counts.count(source, prev_month_start, prev_month_end, yard)
+            for source in ("motive", "incidents"))
 
         # Trend calculation
         if prev_count > 0:
@@ -481,45 +448,30 @@ with st.sidebar:
 #  APPLY FILTERS
 # =====================================================================
 
-# Date filter — only include items with a parseable date inside the range
-motive_filtered = [
-    e for e in all_motive
-    if e.get("date") is not None and start_date <= e["date"] <= end_date
-]
-incidents_filtered = [
-    i for i in all_incidents
-    if i.get("_date") is not None and start_date <= i["_date"] <= end_date
-]
-observations_filtered = [
-    o for o in all_observations
-    if o.get("_date") is not None and start_date <= o["_date"] <= end_date
-]
-audits_filtered = [
-    a for a in all_audits
-    if a.get("_date") is not None and start_date <= a["_date"] <= end_date
-]
-
-# Yard filter (applied to display lists)
-if selected_yard == "All Yards":
-    motive_display = motive_filtered
-    incidents_display = incidents_filtered
-    observations_display = observations_filtered
-    audits_display = audits_filtered
-else:
-    motive_display = [e for e in motive_filtered if e.get("yard") == selected_yard]
-    incidents_display = [i for i in incidents_filtered if i.get("_district") == selected_yard]
-    observations_display = [o for o in observations_filtered if o.get("_district") == selected_yard]
-    audits_display = [a for a in audits_filtered if a.get("_district") == selected_yard]
-
-# Aggregated metrics
-by_type = Counter(e["type"] for e in motive_display)
-by_day = Counter(e["date_str"] for e in motive_display if e.get("date_str"))
-by_yard = Counter(e["yard"] for e in motive_display if e.get("yard"))
-drivers = Counter(e["driver"] for e in motive_display if e.get("driver"))
-unique_drivers = len(drivers)
+# Date and yard filter — only items with a parseable date inside the
+# range, sliced from each table's date index; the Motive aggregates come
+# along from the count cube. Memoized across sessions.
+yard_key = None if selected_yard == "All Yards" else selected_yard
+filtered = filter_data(dataset, data_version, start_date, end_date, yard_key)
+motive_display = filtered["motive"]
+incidents_display = filtered["incidents"]
+observations_display = filtered["observations"]
+audits_display = filtered["audits"]
+
+
+def show_figure(view, chart, build, *key):
+    """Render the view's chart for the current data and filters.
+
+    ``key`` adds whatever else the figure depends on (e.g. one audit's
+    score and rig) when a chart id is drawn more than once.
+    """
+    filters = (start_date, end_date, selected_yard, today, *key)
+    st.plotly_chart(cached_figure(view, chart, data_version, filters, build),
+                    use_container_width=True)
+
 
 # Predictive alerts (always from full unfiltered data for month calc)
-alerts = calculate_predictive_alerts(all_motive, all_incidents)
+alerts = calculate_predictive_alerts(counts, data_version, today)
 
 
 # ── Sidebar quick stats (after filtering) ──
@@ -575,6 +527,12 @@ st.divider()
 
 if view_mode == "Division Overview":
 
+    by_type = filtered["by_type"]
+    by_day = filtered["by_day"]
+    by_yard = filtered["by_yard"]
+    drivers = filtered["drivers"]
+    unique_drivers = len(drivers)
+
     # ── 1  KPI Targets vs Actual ──
     st.markdown(
         '<div class="section-hdr">KPI Targets vs Actual</div>',
@@ -688,8 +646,7 @@ if view_mode == "Division Overview":
     s2.metric("Drivers Flagged", unique_drivers)
     s3.metric("Observations", len(observations_display))
     s4.metric("Incidents", len(incidents_display))
-    s5.metric("Yards with Events",
-              len(set(e["yard"] for e in motive_display if e.get("yard"))))
+    s5.metric("Yards with Events", len(by_yard))
 
     st.write("")
 
@@ -714,30 +671,23 @@ if view_mode == "Division Overview":
         expanded=len(incidents_display) > 0,
     ):
         if incidents_display:
-            inc_rows = [{
-                "Report #": item.get("Report Number", ""),
-                "Type": item.get("Incident Type", "---"),
-                "Date": (item.get("Date") or "---")[:16],
-                "District": item.get("_district", "---"),
-                "Employee": item.get("Employee", "---"),
-            } for item in incidents_display]
+            paged_table("ov_incidents", incidents_display, INCIDENT_COLUMNS)
 
-            st.dataframe(
-                pd.DataFrame(inc_rows),
-                use_container_width=True, hide_index=True)
-
-            type_counts = Counter(r["Type"] for r in inc_rows)
+            type_counts = Counter(
+                shown(item.incident_type) for item in incidents_display)
             if len(type_counts) > 1:
-                fig = go.Figure(go.Bar(
-                    x=list(type_counts.values()),
-                    y=list(type_counts.keys()),
-                    orientation="h", marker_color=RED,
-                ))
-                fig.update_layout(
-                    title="Incidents by Type",
-                    height=max(200, len(type_counts) * 45),
-                    margin=dict(l=20, r=20, t=40, b=20))
-                st.plotly_chart(fig, use_container_width=True)
+                def build():
+                    fig = go.Figure(go.Bar(
+                        x=list(type_counts.values()),
+                        y=list(type_counts.keys()),
+                        orientation="h", marker_color=RED,
+                    ))
+                    fig.update_layout(
+                        title="Incidents by Type",
+                        height=max(200, len(type_counts) * 45),
+                        margin=dict(l=20, r=20, t=40, b=20))
+                    return fig
+                show_figure("overview", "incidents_by_type", build)
         else:
             st.success("No Casing Division incidents in this period.")
 
@@ -746,33 +696,26 @@ if view_mode == "Division Overview":
         f"**KPA Observations --- Casing: {len(observations_display)}**",
     ):
         if observations_display:
-            obs_rows = [{
-                "Report #": item.get("Report Number", ""),
-                "Type": item.get("Type of Observation", "---"),
-                "Date": (item.get("Date") or "---")[:16],
-                "District": item.get("_district", "---"),
-                "Observer": item.get("Observer", "---"),
-                "Description": ((item.get("Description of Observation") or "---")[:100]),
-                "Location": item.get("Location / Task", "---"),
-            } for item in observations_display]
+            paged_table("ov_observations", observations_display,
+                        OBSERVATION_COLUMNS)
 
-            st.dataframe(
-                pd.DataFrame(obs_rows),
-                use_container_width=True, hide_index=True)
-
-            obs_type_counts = Counter(r["Type"] for r in obs_rows)
+            obs_type_counts = Counter(
+                shown(item.observation_type)
+                for item in observations_display)
             if obs_type_counts:
-                fig = go.Figure(go.Pie(
-                    labels=list(obs_type_counts.keys()),
-                    values=list(obs_type_counts.values()),
-                    hole=0.4,
-                    marker=dict(colors=[
-                        RED, BLUE, YELLOW, GREEN, "#7c3aed"]),
-                ))
-                fig.update_layout(
-                    title="Observations by Type", height=300,
-                    margin=dict(l=20, r=20, t=40, b=20))
-                st.plotly_chart(fig, use_container_width=True)
+                def build():
+                    fig = go.Figure(go.Pie(
+                        labels=list(obs_type_counts.keys()),
+                        values=list(obs_type_counts.values()),
+                        hole=0.4,
+                        marker=dict(colors=[
+                            RED, BLUE, YELLOW, GREEN, "#7c3aed"]),
+                    ))
+                    fig.update_layout(
+                        title="Observations by Type", height=300,
+                        margin=dict(l=20, r=20, t=40, b=20))
+                    return fig
+                show_figure("overview", "observations_by_type", build)
         else:
             st.success("No Casing Division observations in this period.")
 
@@ -781,59 +724,46 @@ if view_mode == "Division Overview":
         f"**Driver Events --- Motive: {len(motive_display)}**",
     ):
         if motive_display:
-            drv_rows = []
-            for evt in motive_display:
-                speed = ""
-                if evt.get("start_speed"):
-                    speed = f"{evt['start_speed']:.0f} mph"
-                    if evt.get("end_speed"):
-                        speed += f" -> {evt['end_speed']:.0f} mph"
-                drv_rows.append({
-                    "Driver": evt.get("driver") or "Unknown",
-                    "Event Type": evt["type"].replace("_", " ").title(),
-                    "Date": evt.get("date_str", "---"),
-                    "Vehicle": evt.get("vehicle", "---"),
-                    "Location": (evt.get("location") or "---")[:50],
-                    "Speed": speed,
-                    "Yard": evt.get("yard") or "Unknown",
-                })
-
-            df_drv = pd.DataFrame(drv_rows)
             driver_order = {
                 name: i for i, (name, _) in enumerate(drivers.most_common())}
-            df_drv["_sort"] = df_drv["Driver"].map(
-                lambda x: driver_order.get(x, 999))
-            df_drv = df_drv.sort_values("_sort").drop("_sort", axis=1)
-            st.dataframe(df_drv, use_container_width=True, hide_index=True)
+            paged_table(
+                "ov_events", motive_display, EVENT_COLUMNS,
+                orders={"Most flagged drivers":
+                        lambda e: driver_order.get(e.driver, 999),
+                        "Newest first": None})
 
             col_a, col_b = st.columns(2)
             with col_a:
                 if drivers:
                     top_drv = dict(drivers.most_common(10))
-                    fig = go.Figure(go.Bar(
-                        x=list(top_drv.values()),
-                        y=list(top_drv.keys()),
-                        orientation="h", marker_color=BLUE,
-                    ))
-                    fig.update_layout(
-                        title="Top Drivers by Event Count",
-                        height=max(250, len(top_drv) * 35),
-                        margin=dict(l=20, r=20, t=40, b=20),
-                        yaxis=dict(autorange="reversed"))
-                    st.plotly_chart(fig, use_container_width=True)
+                    def build():
+                        fig = go.Figure(go.Bar(
+                            x=list(top_drv.values()),
+                            y=list(top_drv.keys()),
+                            orientation="h", marker_color=BLUE,
+                        ))
+                        fig.update_layout(
+                            title="Top Drivers by Event Count",
+                            height=max(250, len(top_drv) * 35),
+                            margin=dict(l=20, r=20, t=40, b=20),
+                            yaxis=dict(autorange="reversed"))
+                        return fig
+                    show_figure("overview", "top_drivers", build)
             with col_b:
                 if by_type:
-                    fig = go.Figure(go.Pie(
-                        labels=[t.replace("_", " ").title()
-                                for t in by_type.keys()],
-                        values=list(by_type.values()), hole=0.45,
-                        marker=dict(colors=[
-                            RED, BLUE, YELLOW, GREEN, "#7c3aed", "#e11d48"]),
-                    ))
-                    fig.update_layout(
-                        title="Events by Type", height=300,
-                        margin=dict(l=20, r=20, t=40, b=20))
-                    st.plotly_chart(fig, use_container_width=True)
+                    def build():
+                        fig = go.Figure(go.Pie(
+                            labels=[t.replace("_", " ").title()
+                                    for t in by_type.keys()],
+                            values=list(by_type.values()), hole=0.45,
+                            marker=dict(colors=[
+                                RED, BLUE, YELLOW, GREEN, "#7c3aed", "#e11d48"]),
+                        ))
+                        fig.update_layout(
+                            title="Events by Type", height=300,
+                            margin=dict(l=20, r=20, t=40, b=20))
+                        return fig
+                    show_figure("overview", "event_types", build)
         else:
             st.info("No Motive events in this period.")
 
@@ -844,16 +774,16 @@ if view_mode == "Division Overview":
     ):
         if audits_display:
             audit_rows = [{
-                "Report #": a.get("Report Number", ""),
-                "Date": (a.get("Date") or "---")[:16],
-                "District": a.get("_district", "---"),
-                "Rig": a.get("Rig", "---"),
-                "Audit Type": a.get("Audit Type", "---"),
-                "Observer": a.get("Observer", "---"),
-                "Score": f"{a.get('_score', 0)}%",
-                "Passed": a.get("_passed", 0),
-                "Failed": a.get("_failed", 0),
-                "Items Checked": a.get("_total_checked", 0),
+                "Report #": shown(a.report_number, ""),
+                "Date": (a.timestamp or "---")[:16],
+                "District": a.district,
+                "Rig": shown(a.rig),
+                "Audit Type": shown(a.audit_type),
+                "Observer": shown(a.observer),
+                "Score": f"{a.score}%",
+                "Passed": a.passed,
+                "Failed": a.failed,
+                "Items Checked": a.total_checked,
             } for a in audits_display]
 
             st.dataframe(
@@ -862,46 +792,22 @@ if view_mode == "Division Overview":
 
             # Score gauge for each audit
             for a in audits_display:
-                score = a.get("_score", 0)
-                rig = a.get("Rig", "Unknown")
-                district = a.get("_district", "Unknown")
-                rpt = a.get("Report Number", "")
-                audit_date = (a.get("Date") or "")[:10]
-                observer = a.get("Observer", "---")
-                score_color = (GREEN if score >= 90
-                               else YELLOW if score >= 75 else RED)
+                score = a.score
+                rig = shown(a.rig, "Unknown")
+                district = a.district
+                rpt = shown(a.report_number, "")
+                audit_date = (a.timestamp or "")[:10]
+                observer = shown(a.observer)
 
                 st.markdown(
                     f"---\n**{rig}** | {district} | {audit_date} | "
                     f"Auditor: {observer}")
 
-                # Score bar
-                fig = go.Figure(go.Indicator(
-                    mode="gauge+number",
-                    value=score,
-                    number={"suffix": "%"},
-                    gauge={
-                        "axis": {"range": [0, 100]},
-                        "bar": {"color": score_color},
-                        "steps": [
-                            {"range": [0, 75], "color": "#fee2e2"},
-                            {"range": [75, 90], "color": "#fef3c7"},
-                            {"range": [90, 100], "color": "#d1fae5"},
-                        ],
-                        "threshold": {
-                            "line": {"color": DARK, "width": 2},
-                            "thickness": 0.75, "value": 90,
-                        },
-                    },
-                    title={"text": f"Audit Score --- {rig}"},
-                ))
-                fig.update_layout(
-                    height=220,
-                    margin=dict(l=30, r=30, t=60, b=20))
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(audit_gauge(score, rig),
+                                use_container_width=True)
 
                 # Failed items detail
-                failed_items = a.get("_failed_items", [])
+                failed_items = a.failed_items
                 if failed_items:
                     st.markdown(
                         f"**Failed Items ({len(failed_items)}):**")
@@ -915,38 +821,42 @@ if view_mode == "Division Overview":
                 st.markdown("---")
                 col_a, col_b = st.columns(2)
                 with col_a:
-                    fig = go.Figure(go.Bar(
-                        x=[a.get("Rig", "?") for a in audits_display],
-                        y=[a.get("_score", 0) for a in audits_display],
-                        marker_color=[
-                            GREEN if a.get("_score", 0) >= 90
-                            else YELLOW if a.get("_score", 0) >= 75
-                            else RED for a in audits_display],
-                        text=[f"{a.get('_score', 0)}%"
-                              for a in audits_display],
-                        textposition="outside",
-                    ))
-                    fig.update_layout(
-                        title="Audit Scores by Rig",
-                        yaxis=dict(range=[0, 105]),
-                        height=300,
-                        margin=dict(l=40, r=20, t=40, b=40))
-                    fig.add_hline(
-                        y=90, line_dash="dot", line_color=GREEN,
-                        annotation_text="Target: 90%")
-                    st.plotly_chart(fig, use_container_width=True)
+                    def build():
+                        fig = go.Figure(go.Bar(
+                            x=[shown(a.rig, "?") for a in audits_display],
+                            y=[a.score for a in audits_display],
+                            marker_color=[
+                                GREEN if a.score >= 90
+                                else YELLOW if a.score >= 75
+                                else RED for a in audits_display],
+                            text=[f"{a.score}%"
+                                  for a in audits_display],
+                            textposition="outside",
+                        ))
+                        fig.update_layout(
+                            title="Audit Scores by Rig",
+                            yaxis=dict(range=[0, 105]),
+                            height=300,
+                            margin=dict(l=40, r=20, t=40, b=40))
+                        fig.add_hline(
+                            y=90, line_dash="dot", line_color=GREEN,
+                            annotation_text="Target: 90%")
+                        return fig
+                    show_figure("overview", "audit_scores", build)
                 with col_b:
                     dist_counts = Counter(
-                        a.get("_district", "?") for a in audits_display)
-                    fig = go.Figure(go.Pie(
-                        labels=list(dist_counts.keys()),
-                        values=list(dist_counts.values()),
-                        hole=0.4,
-                    ))
-                    fig.update_layout(
-                        title="Audits by District", height=300,
-                        margin=dict(l=20, r=20, t=40, b=20))
-                    st.plotly_chart(fig, use_container_width=True)
+                        a.district for a in audits_display)
+                    def build():
+                        fig = go.Figure(go.Pie(
+                            labels=list(dist_counts.keys()),
+                            values=list(dist_counts.values()),
+                            hole=0.4,
+                        ))
+                        fig.update_layout(
+                            title="Audits by District", height=300,
+                            margin=dict(l=20, r=20, t=40, b=20))
+                        return fig
+                    show_figure("overview", "audits_by_district", build)
         else:
             st.info("No CSG rig audits in this period.")
 
@@ -960,9 +870,9 @@ if view_mode == "Division Overview":
     if drivers:
         driver_types = {}
         for evt in motive_display:
-            name = evt.get("driver")
+            name = evt.driver
             if name:
-                etype = evt["type"].replace("_", " ").title()
+                etype = evt.type.replace("_", " ").title()
                 driver_types.setdefault(name, Counter())[etype] += 1
 
         rows = []
@@ -1005,19 +915,22 @@ if view_mode == "Division Overview":
         unsafe_allow_html=True)
 
     for yd in YARD_ORDER:
-        yd_events = [e for e in motive_display if e.get("yard") == yd]
-        yd_inc = [i for i in incidents_display if i.get("_district") == yd]
-        yd_obs = [o for o in observations_display if o.get("_district") == yd]
+        shown_yard = yard_key in (None, yd)
+        yd_events = by_yard[yd]
+        yd_inc = (counts.count("incidents", start_date, end_date, yd)
+                  if shown_yard else 0)
+        yd_obs = (counts.count("observations", start_date, end_date, yd)
+                  if shown_yard else 0)
         yd_alert = alerts.get(yd, {})
 
         with st.expander(
-            f"**{yd} Yard** --- {len(yd_events)} events, "
-            f"{len(yd_inc)} incidents, {len(yd_obs)} observations"
+            f"**{yd} Yard** --- {yd_events} events, "
+            f"{yd_inc} incidents, {yd_obs} observations"
         ):
             mc1, mc2, mc3 = st.columns(3)
-            mc1.metric("Motive Events", len(yd_events))
-            mc2.metric("Incidents", len(yd_inc))
-            mc3.metric("Observations", len(yd_obs))
+            mc1.metric("Motive Events", yd_events)
+            mc2.metric("Incidents", yd_inc)
+            mc3.metric("Observations", yd_obs)
 
             if yd_alert:
                 ts = "+" if yd_alert["trend_pct"] >= 0 else ""
@@ -1027,8 +940,8 @@ if view_mode == "Division Overview":
                     f"**Projected:** {yd_alert['projected']} by month-end | "
                     f"**Status:** {yd_alert['label']}")
 
-            yd_drivers = Counter(
-                e["driver"] for e in yd_events if e.get("driver"))
+            yd_drivers = (counts.counts("drivers", start_date, end_date, yd)
+                          if shown_yard else Counter())
             if yd_drivers:
                 st.markdown("**Flagged drivers:**")
                 for dname, dcnt in yd_drivers.most_common(5):
@@ -1049,64 +962,69 @@ if view_mode == "Division Overview":
 
     with chart_l:
         if by_type:
-            fig = go.Figure(go.Pie(
-                labels=[t.replace("_", " ").title() for t in by_type],
-                values=list(by_type.values()), hole=0.45,
-                marker=dict(colors=[
-                    RED, BLUE, YELLOW, GREEN, "#7c3aed", "#e11d48", "#0891b2"]),
-                textinfo="label+percent", textposition="outside",
-            ))
-            fig.update_layout(
-                title="Event Type Breakdown", height=340,
-                margin=dict(l=20, r=20, t=40, b=20), showlegend=False)
-            st.plotly_chart(fig, use_container_width=True)
+            def build():
+                fig = go.Figure(go.Pie(
+                    labels=[t.replace("_", " ").title() for t in by_type],
+                    values=list(by_type.values()), hole=0.45,
+                    marker=dict(colors=[
+                        RED, BLUE, YELLOW, GREEN, "#7c3aed", "#e11d48", "#0891b2"]),
+                    textinfo="label+percent", textposition="outside",
+                ))
+                fig.update_layout(
+                    title="Event Type Breakdown", height=340,
+                    margin=dict(l=20, r=20, t=40, b=20), showlegend=False)
+                return fig
+            show_figure("overview", "event_type_breakdown", build)
 
     with chart_r:
         if by_yard:
-            fig = go.Figure(go.Bar(
-                x=list(by_yard.keys()), y=list(by_yard.values()),
-                marker_color=RED,
-                text=list(by_yard.values()), textposition="outside",
-            ))
-            fig.update_layout(
-                title="Events by Yard", height=340,
-                margin=dict(l=40, r=20, t=40, b=40))
-            st.plotly_chart(fig, use_container_width=True)
+            def build():
+                fig = go.Figure(go.Bar(
+                    x=list(by_yard.keys()), y=list(by_yard.values()),
+                    marker_color=RED,
+                    text=list(by_yard.values()), textposition="outside",
+                ))
+                fig.update_layout(
+                    title="Events by Yard", height=340,
+                    margin=dict(l=40, r=20, t=40, b=40))
+                return fig
+            show_figure("overview", "events_by_yard", build)
 
     # Events by day
     if by_day:
         st.markdown("**Motive Events by Day**")
         sorted_days = sorted(by_day.items())
-        fig = go.Figure(go.Bar(
-            x=[d[0] for d in sorted_days],
-            y=[d[1] for d in sorted_days],
-            marker_color=RED,
-            text=[d[1] for d in sorted_days], textposition="outside",
-        ))
-        fig.update_layout(
-            xaxis_title="Date", yaxis_title="Events",
-            height=300, margin=dict(l=40, r=20, t=20, b=40))
-        st.plotly_chart(fig, use_container_width=True)
+        def build():
+            fig = go.Figure(go.Bar(
+                x=[d[0] for d in sorted_days],
+                y=[d[1] for d in sorted_days],
+                marker_color=RED,
+                text=[d[1] for d in sorted_days], textposition="outside",
+            ))
+            fig.update_layout(
+                xaxis_title="Date", yaxis_title="Events",
+                height=300, margin=dict(l=40, r=20, t=20, b=40))
+            return fig
+        show_figure("overview", "events_by_day", build)
 
     # Observations by day
-    obs_daily = Counter()
-    for item in observations_display:
-        ds = item.get("Date", "")
-        if ds and isinstance(ds, str) and len(ds) >= 10:
-            obs_daily[ds[:10]] += 1
+    obs_daily = counts.by_day(
+        "observations", start_date, end_date, yard_key)
     if obs_daily:
         st.markdown("**KPA Observations by Day**")
         sorted_obs = sorted(obs_daily.items())
-        fig = go.Figure(go.Bar(
-            x=[d[0] for d in sorted_obs],
-            y=[d[1] for d in sorted_obs],
-            marker_color=BLUE,
-            text=[d[1] for d in sorted_obs], textposition="outside",
-        ))
-        fig.update_layout(
-            xaxis_title="Date", yaxis_title="Observations",
-            height=300, margin=dict(l=40, r=20, t=20, b=40))
-        st.plotly_chart(fig, use_container_width=True)
+        def build():
+            fig = go.Figure(go.Bar(
+                x=[d[0] for d in sorted_obs],
+                y=[d[1] for d in sorted_obs],
+                marker_color=BLUE,
+                text=[d[1] for d in sorted_obs], textposition="outside",
+            ))
+            fig.update_layout(
+                xaxis_title="Date", yaxis_title="Observations",
+                height=300, margin=dict(l=40, r=20, t=20, b=40))
+            return fig
+        show_figure("overview", "observations_by_day", build)
 
 
 # =====================================================================
@@ -1123,6 +1041,8 @@ elif view_mode == "Individual Yard":
 
     yard = selected_yard
     alert = alerts.get(yard, {})
+    yd_drivers = filtered["drivers"]
+    unique_drivers = len(yd_drivers)
 
     st.markdown(
         f'<div class="section-hdr">{yard} Yard --- Detail View</div>',
@@ -1176,186 +1096,146 @@ elif view_mode == "Individual Yard":
 
     st.write("")
 
-    # ── Tabs: Incidents | Observations | Drivers | Rig Audits ──
-    tab_inc, tab_obs, tab_drv, tab_aud = st.tabs(
-        ["Incidents", "Observations", "Driver Events", "Rig Audits"])
+    # ── Sections: Incidents | Observations | Drivers | Rig Audits ──
+    # A selector rather than st.tabs: tabs run every tab's body on each
+    # rerun, this only builds the section on screen
+    section = st.radio(
+        "Section",
+        ["Incidents", "Observations", "Driver Events", "Rig Audits"],
+        horizontal=True, label_visibility="collapsed")
 
-    with tab_inc:
+    if section == "Incidents":
         st.markdown(f"### {yard} --- Incidents ({len(incidents_display)})")
         if incidents_display:
-            rows = [{
-                "Report #": item.get("Report Number", ""),
-                "Type": item.get("Incident Type", "---"),
-                "Date": (item.get("Date") or "---")[:16],
-                "Employee": item.get("Employee", "---"),
-            } for item in incidents_display]
-            st.dataframe(
-                pd.DataFrame(rows),
-                use_container_width=True, hide_index=True)
+            paged_table("yd_incidents", incidents_display, INCIDENT_COLUMNS,
+                        hide=("District",))
 
-            tc = Counter(r["Type"] for r in rows)
+            tc = Counter(
+                shown(item.incident_type) for item in incidents_display)
             if tc:
-                fig = go.Figure(go.Bar(
-                    x=list(tc.values()), y=list(tc.keys()),
-                    orientation="h", marker_color=RED))
-                fig.update_layout(
-                    title=f"{yard} Incidents by Type",
-                    height=max(200, len(tc) * 45),
-                    margin=dict(l=20, r=20, t=40, b=20))
-                st.plotly_chart(fig, use_container_width=True)
+                def build():
+                    fig = go.Figure(go.Bar(
+                        x=list(tc.values()), y=list(tc.keys()),
+                        orientation="h", marker_color=RED))
+                    fig.update_layout(
+                        title=f"{yard} Incidents by Type",
+                        height=max(200, len(tc) * 45),
+                        margin=dict(l=20, r=20, t=40, b=20))
+                    return fig
+                show_figure("yard", "incidents_by_type", build)
         else:
             st.success(f"No incidents for {yard} in this period.")
 
-    with tab_obs:
+    elif section == "Observations":
         st.markdown(
             f"### {yard} --- Observations ({len(observations_display)})")
         if observations_display:
-            rows = [{
-                "Report #": item.get("Report Number", ""),
-                "Type": item.get("Type of Observation", "---"),
-                "Date": (item.get("Date") or "---")[:16],
-                "Observer": item.get("Observer", "---"),
-                "Description": (
-                    (item.get("Description of Observation") or "---")[:100]),
-                "Location": item.get("Location / Task", "---"),
-            } for item in observations_display]
-            st.dataframe(
-                pd.DataFrame(rows),
-                use_container_width=True, hide_index=True)
+            paged_table("yd_observations", observations_display,
+                        OBSERVATION_COLUMNS, hide=("District",))
 
             col_a, col_b = st.columns(2)
             with col_a:
-                tc = Counter(r["Type"] for r in rows)
+                tc = Counter(
+                    shown(item.observation_type)
+                    for item in observations_display)
                 if tc:
-                    fig = go.Figure(go.Pie(
-                        labels=list(tc.keys()),
-                        values=list(tc.values()), hole=0.4))
-                    fig.update_layout(
-                        title=f"{yard} by Type", height=300,
-                        margin=dict(l=20, r=20, t=40, b=20))
-                    st.plotly_chart(fig, use_container_width=True)
+                    def build():
+                        fig = go.Figure(go.Pie(
+                            labels=list(tc.keys()),
+                            values=list(tc.values()), hole=0.4))
+                        fig.update_layout(
+                            title=f"{yard} by Type", height=300,
+                            margin=dict(l=20, r=20, t=40, b=20))
+                        return fig
+                    show_figure("yard", "observations_by_type", build)
             with col_b:
-                oc = Counter(r["Observer"] for r in rows)
+                oc = Counter(
+                    shown(item.observer) for item in observations_display)
                 if oc:
-                    fig = go.Figure(go.Bar(
-                        x=list(oc.values()), y=list(oc.keys()),
-                        orientation="h", marker_color=BLUE))
-                    fig.update_layout(
-                        title=f"{yard} by Observer",
-                        height=max(200, len(oc) * 30),
-                        margin=dict(l=20, r=20, t=40, b=20))
-                    st.plotly_chart(fig, use_container_width=True)
+                    def build():
+                        fig = go.Figure(go.Bar(
+                            x=list(oc.values()), y=list(oc.keys()),
+                            orientation="h", marker_color=BLUE))
+                        fig.update_layout(
+                            title=f"{yard} by Observer",
+                            height=max(200, len(oc) * 30),
+                            margin=dict(l=20, r=20, t=40, b=20))
+                        return fig
+                    show_figure("yard", "observations_by_observer", build)
         else:
             st.success(f"No observations for {yard} in this period.")
 
-    with tab_drv:
+    elif section == "Driver Events":
         st.markdown(
             f"### {yard} --- Driver Events ({len(motive_display)})")
         if motive_display:
-            rows = []
-            for evt in motive_display:
-                speed = ""
-                if evt.get("start_speed"):
-                    speed = f"{evt['start_speed']:.0f} mph"
-                    if evt.get("end_speed"):
-                        speed += f" -> {evt['end_speed']:.0f} mph"
-                rows.append({
-                    "Driver": evt.get("driver") or "Unknown",
-                    "Event Type": evt["type"].replace("_", " ").title(),
-                    "Date": evt.get("date_str", "---"),
-                    "Vehicle": evt.get("vehicle", "---"),
-                    "Speed": speed,
-                    "Location": (evt.get("location") or "---")[:50],
-                })
-            st.dataframe(
-                pd.DataFrame(rows),
-                use_container_width=True, hide_index=True)
+            paged_table("yd_events", motive_display, EVENT_COLUMNS,
+                        hide=("Yard",))
 
             col_a, col_b = st.columns(2)
             with col_a:
-                yd_drivers = Counter(
-                    e["driver"] for e in motive_display if e.get("driver"))
                 if yd_drivers:
-                    fig = go.Figure(go.Bar(
-                        x=list(yd_drivers.values()),
-                        y=list(yd_drivers.keys()),
-                        orientation="h", marker_color=YELLOW))
-                    fig.update_layout(
-                        title=f"{yard} --- Events by Driver",
-                        height=max(200, len(yd_drivers) * 35),
-                        margin=dict(l=20, r=20, t=40, b=20),
-                        yaxis=dict(autorange="reversed"))
-                    st.plotly_chart(fig, use_container_width=True)
+                    def build():
+                        fig = go.Figure(go.Bar(
+                            x=list(yd_drivers.values()),
+                            y=list(yd_drivers.keys()),
+                            orientation="h", marker_color=YELLOW))
+                        fig.update_layout(
+                            title=f"{yard} --- Events by Driver",
+                            height=max(200, len(yd_drivers) * 35),
+                            margin=dict(l=20, r=20, t=40, b=20),
+                            yaxis=dict(autorange="reversed"))
+                        return fig
+                    show_figure("yard", "events_by_driver", build)
             with col_b:
                 yd_types = Counter(
-                    e["type"].replace("_", " ").title()
+                    e.type.replace("_", " ").title()
                     for e in motive_display)
                 if yd_types:
-                    fig = go.Figure(go.Pie(
-                        labels=list(yd_types.keys()),
-                        values=list(yd_types.values()), hole=0.4))
-                    fig.update_layout(
-                        title=f"{yard} --- Events by Type", height=300,
-                        margin=dict(l=20, r=20, t=40, b=20))
-                    st.plotly_chart(fig, use_container_width=True)
+                    def build():
+                        fig = go.Figure(go.Pie(
+                            labels=list(yd_types.keys()),
+                            values=list(yd_types.values()), hole=0.4))
+                        fig.update_layout(
+                            title=f"{yard} --- Events by Type", height=300,
+                            margin=dict(l=20, r=20, t=40, b=20))
+                        return fig
+                    show_figure("yard", "events_by_type", build)
         else:
             st.info(f"No Motive events for {yard} in this period.")
 
-    with tab_aud:
+    elif section == "Rig Audits":
         st.markdown(
             f"### {yard} --- Rig Audits ({len(audits_display)})")
         if audits_display:
             rows = [{
-                "Report #": a.get("Report Number", ""),
-                "Date": (a.get("Date") or "---")[:16],
-                "Rig": a.get("Rig", "---"),
-                "Audit Type": a.get("Audit Type", "---"),
-                "Observer": a.get("Observer", "---"),
-                "Score": f"{a.get('_score', 0)}%",
-                "Passed": a.get("_passed", 0),
-                "Failed": a.get("_failed", 0),
+                "Report #": shown(a.report_number, ""),
+                "Date": (a.timestamp or "---")[:16],
+                "Rig": shown(a.rig),
+                "Audit Type": shown(a.audit_type),
+                "Observer": shown(a.observer),
+                "Score": f"{a.score}%",
+                "Passed": a.passed,
+                "Failed": a.failed,
             } for a in audits_display]
             st.dataframe(
                 pd.DataFrame(rows),
                 use_container_width=True, hide_index=True)
 
             for a in audits_display:
-                score = a.get("_score", 0)
-                rig = a.get("Rig", "Unknown")
-                audit_date = (a.get("Date") or "")[:10]
-                observer = a.get("Observer", "---")
-                score_color = (GREEN if score >= 90
-                               else YELLOW if score >= 75 else RED)
+                score = a.score
+                rig = shown(a.rig, "Unknown")
+                audit_date = (a.timestamp or "")[:10]
+                observer = shown(a.observer)
 
                 st.markdown(
                     f"---\n**{rig}** | {audit_date} | "
                     f"Auditor: {observer}")
 
-                fig = go.Figure(go.Indicator(
-                    mode="gauge+number",
-                    value=score,
-                    number={"suffix": "%"},
-                    gauge={
-                        "axis": {"range": [0, 100]},
-                        "bar": {"color": score_color},
-                        "steps": [
-                            {"range": [0, 75], "color": "#fee2e2"},
-                            {"range": [75, 90], "color": "#fef3c7"},
-                            {"range": [90, 100], "color": "#d1fae5"},
-                        ],
-                        "threshold": {
-                            "line": {"color": DARK, "width": 2},
-                            "thickness": 0.75, "value": 90,
-                        },
-                    },
-                    title={"text": f"Audit Score --- {rig}"},
-                ))
-                fig.update_layout(
-                    height=220,
-                    margin=dict(l=30, r=30, t=60, b=20))
-                st.plotly_chart(fig, use_container_width=True)
+                st.plotly_chart(audit_gauge(score, rig),
+                                use_container_width=True)
 
-                failed_items = a.get("_failed_items", [])
+                failed_items = a.failed_items
                 if failed_items:
                     st.markdown(
                         f"**Failed Items ({len(failed_items)}):**")
@@ -1380,19 +1260,17 @@ elif view_mode == "Comparison":
     # Build comparison data (always uses date-filtered, all-yard data)
     comp_rows = []
     for yd in YARD_ORDER:
-        yd_events = [e for e in motive_filtered if e.get("yard") == yd]
-        yd_inc = [i for i in incidents_filtered if i.get("_district") == yd]
-        yd_obs = [o for o in observations_filtered
-                  if o.get("_district") == yd]
-        yd_drv = len(set(e["driver"] for e in yd_events if e.get("driver")))
         a = alerts.get(yd, {})
 
         comp_rows.append({
             "Yard": yd,
-            "Motive Events": len(yd_events),
-            "Incidents": len(yd_inc),
-            "Observations": len(yd_obs),
-            "Drivers Flagged": yd_drv,
+            "Motive Events": counts.count("motive", start_date, end_date, yd),
+            "Incidents": counts.count(
+                "incidents", start_date, end_date, yd),
+            "Observations": counts.count(
+                "observations", start_date, end_date, yd),
+            "Drivers Flagged": len(counts.counts(
+                "drivers", start_date, end_date, yd)),
             "Trend": (f"{'+'if a.get('trend_pct', 0) >= 0 else ''}"
                       f"{a.get('trend_pct', 0):.0f}%"),
             "Projected": a.get("projected", 0),
@@ -1435,32 +1313,36 @@ elif view_mode == "Comparison":
 
     with col_a:
         yards = [r["Yard"] for r in comp_rows]
-        fig = go.Figure()
-        fig.add_trace(go.Bar(
-            name="Motive Events", x=yards,
-            y=[r["Motive Events"] for r in comp_rows],
-            marker_color=RED))
-        fig.add_trace(go.Bar(
-            name="Incidents", x=yards,
-            y=[r["Incidents"] for r in comp_rows],
-            marker_color=BLUE))
-        fig.update_layout(
-            title="Events & Incidents by Yard", barmode="group",
-            height=350, margin=dict(l=40, r=20, t=40, b=40))
-        st.plotly_chart(fig, use_container_width=True)
+        def build():
+            fig = go.Figure()
+            fig.add_trace(go.Bar(
+                name="Motive Events", x=yards,
+                y=[r["Motive Events"] for r in comp_rows],
+                marker_color=RED))
+            fig.add_trace(go.Bar(
+                name="Incidents", x=yards,
+                y=[r["Incidents"] for r in comp_rows],
+                marker_color=BLUE))
+            fig.update_layout(
+                title="Events & Incidents by Yard", barmode="group",
+                height=350, margin=dict(l=40, r=20, t=40, b=40))
+            return fig
+        show_figure("comparison", "events_incidents", build)
 
     with col_b:
-        fig = go.Figure(go.Bar(
-            x=yards,
-            y=[r["Observations"] for r in comp_rows],
-            marker_color=GREEN,
-            text=[r["Observations"] for r in comp_rows],
-            textposition="outside",
-        ))
-        fig.update_layout(
-            title="Observations by Yard", height=350,
-            margin=dict(l=40, r=20, t=40, b=40))
-        st.plotly_chart(fig, use_container_width=True)
+        def build():
+            fig = go.Figure(go.Bar(
+                x=yards,
+                y=[r["Observations"] for r in comp_rows],
+                marker_color=GREEN,
+                text=[r["Observations"] for r in comp_rows],
+                textposition="outside",
+            ))
+            fig.update_layout(
+                title="Observations by Yard", height=350,
+                margin=dict(l=40, r=20, t=40, b=40))
+            return fig
+        show_figure("comparison", "observations", build)
 
     # Trend comparison
     st.markdown("**Trend Comparison (Current Month vs Previous)**")
@@ -1470,22 +1352,24 @@ elif view_mode == "Comparison":
     trend_colors = [alerts.get(y, {}).get("color", GRAY)
                     for y in trend_yards]
 
-    fig = go.Figure(go.Bar(
-        x=trend_yards, y=trend_vals,
-        marker_color=trend_colors,
-        text=[f"{v:+.0f}%" for v in trend_vals],
-        textposition="outside",
-    ))
-    fig.update_layout(
-        title="Month-over-Month Trend by Yard",
-        yaxis_title="% Change", height=350,
-        margin=dict(l=40, r=20, t=40, b=40))
-    fig.add_hline(y=0, line_dash="dash", line_color=GRAY)
-    fig.add_hline(y=30, line_dash="dot", line_color=RED,
-                  annotation_text="High Risk (+30%)")
-    fig.add_hline(y=-10, line_dash="dot", line_color=GREEN,
-                  annotation_text="Improving (-10%)")
-    st.plotly_chart(fig, use_container_width=True)
+    def build():
+        fig = go.Figure(go.Bar(
+            x=trend_yards, y=trend_vals,
+            marker_color=trend_colors,
+            text=[f"{v:+.0f}%" for v in trend_vals],
+            textposition="outside",
+        ))
+        fig.update_layout(
+            title="Month-over-Month Trend by Yard",
+            yaxis_title="% Change", height=350,
+            margin=dict(l=40, r=20, t=40, b=40))
+        fig.add_hline(y=0, line_dash="dash", line_color=GRAY)
+        fig.add_hline(y=30, line_dash="dot", line_color=RED,
+                      annotation_text="High Risk (+30%)")
+        fig.add_hline(y=-10, line_dash="dot", line_color=GREEN,
+                      annotation_text="Improving (-10%)")
+        return fig
+    show_figure("comparison", "trend", build)
 
 
 # =====================================================================
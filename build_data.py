@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+BRHAS Safety Dashboard - Build Stage
+Turns the raw data/*.json (or Parquet) payloads into the normalized
+Casing Division tables the dashboard renders from, and writes them to
+data/normalized/. Runs at the end of every fetch so the app only has to
+load finished tables instead of re-parsing the raw dumps on each render.
+
+Each table records the size/mtime of the raw file it was built from; if
+the raw data has changed since (or the table is missing), load_tables()
+rebuilds in-process, so the app is never ahead of or behind the data.
+
+Motive units are classified into divisions once and remembered in
+data/vehicles.json, so event filtering is a set lookup; likewise each
+rig audit form revision's checklist questions are listed once in
+data/audit_manifest.json. Only save_tables() writes those lookups.
+"""
+
+import hashlib
+import json
+import logging
+import sys
+import threading
+from dataclasses import fields
+from functools import lru_cache
+from pathlib import Path
+
+import datastore
+from safety_data import (
+    CSG_AUDIT_FORM, KpaItem, MotiveEvent, RigAudit, build_audit_manifest,
+    build_vehicle_registry, get_all_kpa_items, get_all_motive_events,
+    get_all_rig_audits,
+)
+
+DATA_DIR = Path(__file__).parent / "data"
+NORMALIZED_DIR = "normalized"
+VEHICLES_FILE = "vehicles.json"
+AUDIT_MANIFEST_FILE = "audit_manifest.json"
+
+# Raw fields each builder reads — only these columns are loaded from the
+# Parquet store (rig audits need every checklist column, so they are
+# loaded whole but only for CSG_AUDIT_FORM rows).
+MOTIVE_COLUMNS = (
+    "id", "type", "start_time", "location", "start_speed", "end_speed",
+    "driver.first_name", "driver.last_name", "vehicle.number",
+)
+KPA_COLUMNS = (
+    "Report", "Report Number", "Date", "District", "Service Line",
+    "service_line", "Observer", "Incident Type", "Employee",
+    "Type of Observation", "Description of Observation", "Location / Task",
+)
+AUDIT_FILTERS = (("Report", "==", CSG_AUDIT_FORM),)
+
+log = logging.getLogger("build_data")
+
+
+def _load_lookup(data_dir, filename):
+    """A data/ JSON lookup file as a dict ({} if absent or unreadable)."""
+    path = data_dir / filename
+    if not path.exists():
+        return {}
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except Exception as e:
+        log.warning(f"  {path.name}: unreadable ({e}) — rediscovering")
+        return {}
+
+
+def _save_lookup(data_dir, filename, lookup):
+    path = data_dir / filename
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "w") as f:
+        json.dump(dict(sorted(lookup.items())), f, indent=2)
+    tmp.replace(path)
+
+
+def load_vehicle_registry(data_dir=DATA_DIR):
+    """{vehicle number: division} from data/vehicles.json ({} if absent)."""
+    return _load_lookup(data_dir, VEHICLES_FILE)
+
+
+def load_audit_manifest(data_dir=DATA_DIR):
+    """{form: {signature: [question columns]}} from data/audit_manifest.json."""
+    return _load_lookup(data_dir, AUDIT_MANIFEST_FILE)
+
+
+# Builders only read the lookups; save_tables() is what extends them, so
+# an in-process rebuild from the app never writes to data/
+def _motive_events(raw, data_dir):
+    """Casing events, classifying only units the registry hasn't seen."""
+    return get_all_motive_events(raw, load_vehicle_registry(data_dir))
+
+
+def _rig_audits(raw, data_dir):
+    """Scored rig audits, with questions ordered by the form's manifest."""
+    manifest = load_audit_manifest(data_dir).get(CSG_AUDIT_FORM, {})
+    return get_all_rig_audits(raw, manifest)
+
+
+# table → (raw file, builder(raw, data_dir), record type, raw columns,
+#          raw filters)
+TABLES = {
+    "motive": ("motive_events.json", _motive_events, MotiveEvent,
+               MOTIVE_COLUMNS, None),
+    "incidents": ("kpa_incidents.json",
+                  lambda raw, _: get_all_kpa_items(raw, "incidents"),
+                  KpaItem, KPA_COLUMNS, None),
+    "observations": ("kpa_observations.json",
+                     lambda raw, _: get_all_kpa_items(raw, "observations"),
+                     KpaItem, KPA_COLUMNS, None),
+    "audits": ("kpa_observations.json", _rig_audits, RigAudit,
+               None, AUDIT_FILTERS),
+}
+
+
+def _raw_path(data_dir, filename):
+    """The file load_raw() reads: the Parquet twin if it was written from
+    the JSON that is there now (or the JSON is gone), else the JSON.
+
+    A fetch that only rewrites the JSON (fetch_data.py) leaves the twin
+    stale; it is ignored from then on instead of shadowing the new data.
+    """
+    path = data_dir / filename
+    columnar = datastore.columnar_path(path)
+    if not columnar.exists():
+        return path
+    if not path.exists():
+        return columnar
+    return columnar if _twin_source(columnar) == file_hash(path) else path
+
+
+def _source_stamp(data_dir, filename):
+    """Identify the raw file a table is built from, or None if absent."""
+    path = _raw_path(data_dir, filename)
+    if not path.exists():
+        return None
+    st = path.stat()
+    return {"file": path.name, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+@lru_cache(maxsize=32)
+def _content_hash(path, size, mtime_ns):
+    """sha256 of a file, computed once per (path, size, mtime)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_hash(path):
+    """sha256 of a file, or None if it is absent."""
+    try:
+        st = path.stat()
+    except FileNotFoundError:
+        return None
+    return _content_hash(str(path), st.st_size, st.st_mtime_ns)
+
+
+def _twin_source(columnar):
+    st = columnar.stat()
+    return _twin_source_at(str(columnar), st.st_size, st.st_mtime_ns)
+
+
+@lru_cache(maxsize=32)
+def _twin_source_at(path, size, mtime_ns):
+    """The JSON sha256 a Parquet twin was written from (None if unknown)."""
+    try:
+        return datastore.read_meta(path).get("source_sha256")
+    except Exception:
+        return None
+
+
+def data_fingerprint(data_dir=DATA_DIR):
+    """(file, sha256) for every raw file the tables are built from — the
+    JSON and its Parquet twin, when there is one.
+
+    Changes only when a fetch rewrites one of them with different
+    content, so it can key a cache of the loaded tables. A file is only
+    re-hashed when its size or mtime changes.
+    """
+    fingerprint = []
+    for filename in dict.fromkeys(t[0] for t in TABLES.values()):
+        path = data_dir / filename
+        fingerprint.append((filename, file_hash(path)))
+        columnar = datastore.columnar_path(path)
+        if columnar.exists():
+            fingerprint.append((columnar.name, file_hash(columnar)))
+    return tuple(fingerprint)
+
+
+class DataWatcher:
+    """Keeps a data_fingerprint() token current as data/ changes.
+
+    A daemon thread stats the raw files (JSON and Parquet twin) every
+    ``interval`` seconds; only when one was replaced — new inode, size or
+    mtime — is the fingerprint recomputed. Reading ``version`` is free,
+    and caches keyed on it turn over as soon as a fetch lands.
+    """
+
+    def __init__(self, data_dir=DATA_DIR, interval=2.0):
+        self.data_dir = data_dir
+        self.interval = interval
+        self._stats = self._stat_files()
+        self.version = data_fingerprint(data_dir)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._run, name="data-watcher", daemon=True)
+        self._thread.start()
+
+    def _stat_files(self):
+        stats = []
+        for filename in dict.fromkeys(t[0] for t in TABLES.values()):
+            path = self.data_dir / filename
+            for p in (path, datastore.columnar_path(path)):
+                try:
+                    st = p.stat()
+                except FileNotFoundError:
+                    stats.append(None)
+                else:
+                    stats.append((st.st_ino, st.st_size, st.st_mtime_ns))
+        return stats
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            stats = self._stat_files()
+            if stats == self._stats:
+                continue
+            try:
+                self.version = data_fingerprint(self.data_dir)
+            except OSError as e:
+                log.warning(f"  data watcher: {e} — retrying")
+                continue
+            self._stats = stats
+            log.info("  data watcher: raw data changed")
+
+    def stop(self):
+        self._stop.set()
+
+
+def load_raw(data_dir, filename, columns=None, filters=None):
+    """Load a data/ payload, preferring its Parquet twin when present.
+
+    ``columns``/``filters`` only apply to the Parquet path; the JSON
+    fallback always returns everything, so builders filter rows anyway.
+    """
+    path = _raw_path(data_dir, filename)
+    if path.suffix == ".parquet":
+        return datastore.read_payload(path, columns, filters)
+    if path.exists():
+        with open(path) as f:
+            return json.load(f)
+    return None
+
+
+def build_table(data_dir, name):
+    """Build one normalized table from its raw payload.
+
+    Returns a payload {"records": [...], "fetched_at": ..., "source": ...}.
+    """
+    filename, builder, _, columns, filters = TABLES[name]
+    source = _source_stamp(data_dir, filename)
+    raw = load_raw(data_dir, filename, columns, filters)
+    return {
+        "records": builder(raw, data_dir),
+        "fetched_at": (raw or {}).get("fetched_at", ""),
+        "source": source,
+    }
+
+
+def _to_row(record):
+    return {f.name: getattr(record, f.name) for f in fields(record)}
+
+
+def _from_row(record_type, row):
+    # Parquet drops nulls on read and returns lists for tuples
+    return record_type(**{
+        f.name: (tuple(row[f.name]) if isinstance(row.get(f.name), list)
+                 else row.get(f.name))
+        for f in fields(record_type)
+    })
+
+
+def _table_path(data_dir, name):
+    return data_dir / NORMALIZED_DIR / f"{name}.parquet"
+
+
+def _read_table(data_dir, name):
+    """Read a saved table if it was built from the current raw file."""
+    path = _table_path(data_dir, name)
+    if not path.exists():
+        return None
+    try:
+        table = datastore.read_payload(path)
+    except Exception as e:
+        log.warning(f"  {path.name}: unreadable ({e}) — rebuilding")
+        return None
+    if table.get("source") != _source_stamp(data_dir, TABLES[name][0]):
+        return None
+    record_type = TABLES[name][2]
+    table["records"] = [_from_row(record_type, r) for r in table["records"]]
+    return table
+
+
+def save_lookups(data_dir=DATA_DIR):
+    """Add new vehicles and audit form revisions to their data/ lookups."""
+    motive_raw = load_raw(data_dir, "motive_events.json", ("vehicle.number",))
+    known = load_vehicle_registry(data_dir)
+    registry = build_vehicle_registry(motive_raw, known)
+    if len(registry) != len(known):
+        _save_lookup(data_dir, VEHICLES_FILE, registry)
+        log.info(f"  {VEHICLES_FILE}: {len(registry) - len(known)} new units")
+
+    audits_raw = load_raw(data_dir, "kpa_observations.json", ("Report",),
+                          AUDIT_FILTERS)
+    manifests = load_audit_manifest(data_dir)
+    known = manifests.get(CSG_AUDIT_FORM, {})
+    manifest = build_audit_manifest(audits_raw, known)
+    if len(manifest) != len(known):
+        _save_lookup(data_dir, AUDIT_MANIFEST_FILE,
+                     {**manifests, CSG_AUDIT_FORM: manifest})
+        log.info(f"  {AUDIT_MANIFEST_FILE}: "
+                 f"{len(manifest) - len(known)} new form revisions")
+
+
+def save_tables(data_dir=DATA_DIR):
+    """Update the lookups, then build every normalized table and write it
+    to data/normalized/."""
+    save_lookups(data_dir)
+    out_dir = data_dir / NORMALIZED_DIR
+    out_dir.mkdir(parents=True, exist_ok=True)
+    for name in TABLES:
+        table = build_table(data_dir, name)
+        rows = [_to_row(r) for r in table["records"]]
+        datastore.write_payload(_table_path(data_dir, name),
+                                {**table, "records": rows}, "records")
+        log.info(f"  Built {NORMALIZED_DIR}/{name}.parquet "
+                 f"({len(table['records'])} records)")
+
+
+def load_tables(data_dir=DATA_DIR):
+    """Return {"motive", "incidents", "observations", "audits": [records],
+    "fetched_at": str}, from data/normalized/ when it is current."""
+    tables = {}
+    fetched_at = ""
+    for name in TABLES:
+        table = _read_table(data_dir, name) or build_table(data_dir, name)
+        tables[name] = table["records"]
+        fetched_at = fetched_at or table.get("fetched_at") or ""
+    tables["fetched_at"] = fetched_at
+    return tables
+
+
+def main():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="[%(asctime)s] %(levelname)s  %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    data_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else DATA_DIR
+    log.info(f"Building normalized tables from {data_dir}")
+    save_tables(data_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+BRHAS Safety Dashboard - Columnar Data Store
+Writes each fetched dataset as a Parquet twin of its data/*.json file
+(typed, dictionary-encoded, zstd-compressed columns) and reads it back
+as the same {"<key>": [records], "fetched_at": ..., ...} payload, with
+optional column projection and row filters.
+"""
+
+import json
+from datetime import date
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+META_KEY = b"brhas"
+ROW_GROUP_SIZE = 10_000
+NESTED_SEP = "."
+
+
+def columnar_path(path):
+    """data/kpa_incidents.json → data/kpa_incidents.parquet"""
+    return path.with_suffix(".parquet")
+
+
+def _flatten(record, prefix=""):
+    """{"vehicle": {"number": "12C"}} → {"vehicle.number": "12C"}"""
+    flat = {}
+    for key, value in record.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict) and value:
+            flat.update(_flatten(value, name + NESTED_SEP))
+        else:
+            flat[name] = value
+    return flat
+
+
+def _unflatten(record):
+    nested = {}
+    for key, value in record.items():
+        if value is None:
+            continue
+        *parents, leaf = key.split(NESTED_SEP)
+        node = nested
+        for part in parents:
+            node = node.setdefault(part, {})
+        node[leaf] = value
+    return nested
+
+
+def _column_types(records):
+    """Pick one Arrow type per column from every value it holds.
+
+    Strings become dictionary-encoded; ints/floats/bools/dates stay native.
+    Anything mixed or nested (lists, "" next to numbers) is stored as
+    JSON text so it reads back exactly.
+    """
+    seen = {}
+    for record in records:
+        for key, value in record.items():
+            if value is not None:
+                seen.setdefault(key, set()).add(type(value))
+            else:
+                seen.setdefault(key, set())
+
+    types = {}
+    for key, kinds in seen.items():
+        if kinds <= {str}:
+            types[key] = "str"
+        elif kinds == {bool}:
+            types[key] = "bool"
+        elif kinds == {int}:
+            types[key] = "int"
+        elif kinds <= {int, float}:
+            types[key] = "float"
+        elif kinds == {date}:
+            types[key] = "date"
+        else:
+            types[key] = "json"
+    return types
+
+
+_ARROW_TYPES = {
+    "str": pa.dictionary(pa.int32(), pa.string()),
+    "bool": pa.bool_(),
+    "int": pa.int64(),
+    "float": pa.float64(),
+    "date": pa.date32(),
+    "json": pa.string(),
+}
+
+
+def _batch(rows, types, schema):
+    arrays = []
+    for key, kind in types.items():
+        values = [row.get(key) for row in rows]
+        if kind == "json":
+            values = [None if v is None else json.dumps(v, default=str)
+                      for v in values]
+        if kind == "str":
+            arrays.append(pa.array(values, pa.string()).dictionary_encode())
+        else:
+            arrays.append(pa.array(values, _ARROW_TYPES[kind]))
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+
+def write_payload(path, payload, key, nested=False):
+    """Write payload[key] (a list, or any re-iterable) as Parquet at path.
+
+    The other payload fields (fetched_at, period, count …) go into the
+    file's metadata. Records are read twice — once to settle the schema,
+    once to write row groups — so a streamed record log never has to be
+    held in memory. ``nested`` flattens sub-dicts into dotted columns
+    (Motive events) and is undone on read.
+    """
+    records = payload.get(key) or []
+
+    def rows():
+        for record in records:
+            yield _flatten(record) if nested else record
+
+    types = _column_types(rows())
+    meta = {k: v for k, v in payload.items() if k != key}
+    meta.update({"key": key, "nested": nested, "json_columns": [
+        k for k, kind in types.items() if kind == "json"]})
+    schema = pa.schema(
+        [pa.field(k, _ARROW_TYPES[kind]) for k, kind in types.items()],
+        metadata={META_KEY: json.dumps(meta, default=str).encode()},
+    )
+
+    tmp = path.with_name(f".tmp.{path.name}")
+    with pq.ParquetWriter(tmp, schema, compression="zstd") as writer:
+        batch = []
+        for row in rows():
+            batch.append(row)
+            if len(batch) >= ROW_GROUP_SIZE:
+                writer.write_batch(_batch(batch, types, schema))
+                batch = []
+        if batch or not types:
+            writer.write_batch(_batch(batch, types, schema))
+    tmp.replace(path)
+
+
+def read_meta(path):
+    """The payload fields write_payload() stored in a file's metadata."""
+    meta = json.loads(pq.read_schema(path).metadata[META_KEY])
+    return {k: v for k, v in meta.items()
+            if k not in ("key", "nested", "json_columns")}
+
+
+def read_payload(path, columns=None, filters=None):
+    """Read a write_payload() file back into its JSON-shaped payload.
+
+    ``columns`` limits which record fields are loaded (missing ones are
+    ignored; dotted names address nested Motive fields); ``filters`` is a
+    pyarrow filter list such as [("Report", "==", "...")]. Only non-null
+    fields are kept in each record, like the original JSON.
+    """
+    schema = pq.read_schema(path)
+    meta = json.loads(schema.metadata[META_KEY])
+    names = set(schema.names)
+    if columns is not None:
+        columns = [c for c in columns if c in names]
+    if filters:
+        filters = [f for f in filters if f[0] in names] or None
+
+    table = pq.read_table(path, columns=columns, filters=filters)
+    # Forms share one file, so most columns are empty for a given subset
+    table = table.select([
+        name for name, col in zip(table.column_names, table.columns)
+        if col.null_count < len(col)
+    ])
+    json_columns = set(meta["json_columns"]) & set(table.column_names)
+    records = []
+    for row in table.to_pylist():
+        for name in json_columns:
+            if row[name] is not None:
+                row[name] = json.loads(row[name])
+        if meta["nested"]:
+            records.append(_unflatten(row))
+        else:
+            records.append({k: v for k, v in row.items() if v is not None})
+
+    payload = {k: v for k, v in meta.items()
+               if k not in ("key", "nested", "json_columns")}
+    payload[meta["key"]] = records
+    return payload
@@ -7,10 +7,11 @@ Runs daily via GitHub Actions at 6:30 AM
 
 import os
 import json
-import requests
 from datetime import datetime, timedelta
 from pathlib import Path
 
+import http_client
+
 # API Credentials (from environment variables)
 MOTIVE_API_KEY = os.getenv("MOTIVE_API_KEY", "")
 KPA_API_TOKEN = os.getenv("KPA_API_TOKEN", "")
@@ -48,7 +49,7 @@ def fetch_motive_events():
             "end_time": end_date.isoformat()
         }
         
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        response = http_client.get(url, headers=headers, params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -75,7 +76,7 @@ def fetch_kpa_incidents():
         url = f"{KPA_BASE_URL}/incidents"
         params = {"days": LOOKBACK_DAYS}
         
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        response = http_client.get(url, headers=headers, params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -102,7 +103,7 @@ def fetch_kpa_observations():
         url = f"{KPA_BASE_URL}/observations"
         params = {"days": LOOKBACK_DAYS}
         
-        response = requests.get(url, headers=headers, params=params, timeout=10)
+        response = http_client.get(url, headers=headers, params=params)
         
         if response.status_code == 200:
             data = response.json()
@@ -155,6 +156,8 @@ def main():
     except Exception as e:
         log(f"✗ Error saving observations: {e}")
     
+    http_client.close_all()
+
     log("\n" + "=" * 70)
     log("✓ DATA REFRESH COMPLETE")
     log("=" * 70)
@@ -6,14 +6,21 @@ Saves JSON to data/ folder for the Streamlit dashboard.
 """
 
 import os
+import gzip
 import json
 import logging
-import requests
+import threading
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 from dotenv import load_dotenv
 
+import build_data
+import datastore
+import http_client
+
 # Load .env from project root
 load_dotenv(Path(__file__).parent / ".env")
 
@@ -25,6 +32,9 @@ KPA_BASE = "https://api.kpaehs.com/v1"
 
 DATA_DIR = Path(__file__).parent / "data"
 
+# Max KPA forms fetched in parallel (each form still pages sequentially)
+KPA_MAX_WORKERS = int(os.getenv("KPA_MAX_WORKERS", "4"))
+
 # Logging
 logging.basicConfig(
     level=logging.INFO,
@@ -34,10 +44,185 @@ logging.basicConfig(
 log = logging.getLogger("fetch_live_data")
 
 
+# ── Checkpoints ───────────────────────────────────────────────────────
+
+CHECKPOINT_DIR = DATA_DIR / ".checkpoints"
+DAY_MS = 86_400_000
+
+
+class Checkpoint:
+    """Append-only log of the pages one source has fully received.
+
+    Stored as NDJSON in data/.checkpoints/<name>.ndjson: the first line
+    holds the key the run was started with (date window, form id …),
+    then one line per completed page. A torn last line from a crash is
+    ignored, and a log whose key no longer matches is thrown away.
+    main() clears every checkpoint once the final outputs are saved.
+    """
+
+    def __init__(self, name, key):
+        self.path = CHECKPOINT_DIR / f"{name}.ndjson"
+        self.key = key
+        self._lock = threading.Lock()
+        self._started = False
+
+    def load(self):
+        """Return the completed-page entries from a previous run."""
+        entries = []
+        if not self.path.exists():
+            return entries
+        with open(self.path) as f:
+            for i, line in enumerate(f):
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    break  # torn write
+                if i == 0:
+                    if entry.get("key") != self.key:
+                        return []
+                    self._started = True
+                    continue
+                entries.append(entry)
+        return entries
+
+    def append(self, entry):
+        with self._lock:
+            CHECKPOINT_DIR.mkdir(parents=True, exist_ok=True)
+            mode = "a" if self._started else "w"
+            with open(self.path, mode) as f:
+                if not self._started:
+                    f.write(json.dumps({"key": self.key}) + "\n")
+                    self._started = True
+                f.write(json.dumps(entry, default=str) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+
+def _clear_checkpoints():
+    if CHECKPOINT_DIR.exists():
+        for path in CHECKPOINT_DIR.glob("*.ndjson"):
+            path.unlink()
+
+
 # ── Motive ────────────────────────────────────────────────────────────
 
 LOOKBACK_DAYS = 90  # Fetch 90 days so dashboard 7/30/90/custom filters all work
 
+MOTIVE_PER_PAGE = 100
+MOTIVE_MAX_PAGES = 50  # safety cap, only used when the API reports no total
+# Max Motive pages in flight at once (http_client may throttle further)
+MOTIVE_MAX_WORKERS = int(os.getenv("MOTIVE_MAX_WORKERS", "4"))
+
+
+def _motive_v2_page(headers, start, end, page):
+    """GET one page of /v2/driver_performance_events.
+
+    Returns the decoded JSON, or None if the page still fails after
+    http_client's retries.
+    """
+    resp = http_client.get(
+        f"{MOTIVE_BASE}/v2/driver_performance_events",
+        headers=headers,
+        params={
+            "start_date": start.strftime("%Y-%m-%d"),
+            "end_date": end.strftime("%Y-%m-%d"),
+            "per_page": MOTIVE_PER_PAGE,
+            "page_no": page,
+        },
+    )
+    if resp.status_code != 200:
+        log.warning(f"  v2 page {page} failed ({resp.status_code}): "
+                    f"{resp.text[:300]}")
+        return None
+    return resp.json()
+
+
+def _motive_v2_events(headers, start, end):
+    """Fetch every v2 page, in parallel once page 1 has been seen.
+
+    If page 1 carries pagination.total the remaining pages are requested
+    all at once; otherwise pages are fetched in waves of
+    MOTIVE_MAX_WORKERS until a short page. Pages are stitched back in
+    page order and de-duplicated by event id. Completed pages are
+    checkpointed, so a rerun for the same date window only fetches the
+    pages it is still missing.
+    """
+    checkpoint = Checkpoint("motive", [start.strftime("%Y-%m-%d"),
+                                       end.strftime("%Y-%m-%d")])
+    pages = {}
+    total = None
+    for entry in checkpoint.load():
+        pages[entry["page"]] = entry["events"]
+        total = entry["total"]
+
+    def fetch(page):
+        # A page that raises counts as failed, like a non-200 one, so the
+        # pages already fetched are kept and it's reported as missing
+        try:
+            return _motive_v2_page(headers, start, end, page)
+        except Exception as e:
+            log.warning(f"  v2 page {page} error: {e}")
+            return None
+
+    def keep(page, data):
+        pages[page] = data.get("driver_performance_events", [])
+        checkpoint.append({"page": page, "total": total,
+                           "events": pages[page]})
+
+    if pages:
+        log.info(f"Motive: resuming with {len(pages)} checkpointed pages")
+    else:
+        log.info("Motive: GET /v2/driver_performance_events page 1 …")
+        first = fetch(1)
+        if first is None:
+            return []
+        total = (first.get("pagination") or {}).get("total")
+        keep(1, first)
+
+    with ThreadPoolExecutor(max_workers=MOTIVE_MAX_WORKERS) as pool:
+        if isinstance(total, int):
+            last = max(1, -(-total // MOTIVE_PER_PAGE))
+            todo = [p for p in range(2, last + 1) if p not in pages]
+            log.info(f"  {total} events → {last} pages ({len(todo)} to fetch)")
+            for page, data in zip(todo, pool.map(fetch, todo)):
+                if data is not None:
+                    keep(page, data)
+        else:
+            next_page = 2
+            done = any(len(ev) < MOTIVE_PER_PAGE for ev in pages.values())
+            while not done and next_page <= MOTIVE_MAX_PAGES:
+                wave = range(next_page, min(next_page + MOTIVE_MAX_WORKERS,
+                                            MOTIVE_MAX_PAGES + 1))
+                todo = [p for p in wave if p not in pages]
+                for page, data in zip(todo, pool.map(fetch, todo)):
+                    if data is None:
+                        done = True
+                        continue
+                    keep(page, data)
+                if any(len(pages.get(p, ())) < MOTIVE_PER_PAGE
+                       for p in wave if p in pages):
+                    done = True
+                next_page = wave.stop
+
+    expected = last if isinstance(total, int) else max(pages)
+    missing = [p for p in range(1, expected + 1) if p not in pages]
+    if missing:
+        log.error(f"  v2 pages {missing} still failing after retries "
+                  f"— events are incomplete")
+
+    all_events = []
+    seen = set()
+    for page in sorted(pages):
+        for entry in pages[page]:
+            evt_id = entry.get("driver_performance_event", entry).get("id")
+            if evt_id is not None:
+                if evt_id in seen:
+                    continue
+                seen.add(evt_id)
+            all_events.append(entry)
+    log.info(f"  ✓ {len(pages)} pages: {len(all_events)} events")
+    return all_events
+
 
 def fetch_motive_events():
     """Fetch driver safety events from Motive (last 90 days, paginated)."""
@@ -52,36 +237,7 @@ def fetch_motive_events():
 
     # Try v2 driver_performance_events with pagination
     try:
-        page = 1
-        while True:
-            log.info(f"Motive: GET /v2/driver_performance_events page {page} …")
-            resp = requests.get(
-                f"{MOTIVE_BASE}/v2/driver_performance_events",
-                headers=headers,
-                params={
-                    "start_date": start.strftime("%Y-%m-%d"),
-                    "end_date": end.strftime("%Y-%m-%d"),
-                    "per_page": 100,
-                    "page_no": page,
-                },
-                timeout=30,
-            )
-            log.info(f"  → {resp.status_code}")
-            if resp.status_code != 200:
-                log.warning(f"  v2 failed: {resp.text[:300]}")
-                break
-            data = resp.json()
-            events = data.get("driver_performance_events", [])
-            if not events:
-                break
-            all_events.extend(events)
-            log.info(f"  ✓ page {page}: {len(events)} events (total: {len(all_events)})")
-            # Stop if fewer than a full page (last page)
-            if len(events) < 100:
-                break
-            page += 1
-            if page > 50:  # safety cap
-                break
+        all_events = _motive_v2_events(headers, start, end)
     except Exception as e:
         log.error(f"  v2 error: {e}")
 
@@ -89,7 +245,7 @@ def fetch_motive_events():
     if not all_events:
         try:
             log.info("Motive: trying GET /v1/safety/events …")
-            resp = requests.get(
+            resp = http_client.get(
                 f"{MOTIVE_BASE}/v1/safety/events",
                 headers=headers,
                 params={
@@ -97,7 +253,6 @@ def fetch_motive_events():
                     "start_time": start.isoformat(),
                     "end_time": end.isoformat(),
                 },
-                timeout=30,
             )
             log.info(f"  → {resp.status_code}")
             if resp.status_code == 200:
@@ -140,7 +295,7 @@ def _kpa_post(method, payload=None):
     body = dict(payload or {})
     body["token"] = KPA_API_TOKEN
     url = f"{KPA_BASE}/{method}"
-    resp = requests.post(url, json=body, timeout=30)
+    resp = http_client.post(url, json=body)
     log.info(f"  KPA {method}: {resp.status_code}")
     if resp.status_code == 200:
         return resp.json()
@@ -161,133 +316,415 @@ def _kpa_discover_forms():
     return []
 
 
-def _kpa_fetch_flat(form_id, form_name, after_ms):
+KPA_PAGE_LIMIT = 1000  # responses.flat maximum rows per page
+
+
+def _kpa_record_key(record):
+    """De-duplication key for a remapped KPA row."""
+    return (record.get("Report Number") or record.get("Link")
+            or json.dumps(record, sort_keys=True, default=str))
+
+
+def _kpa_fetch_flat(label, form_id, form_name, after_ms, sink=None):
     """Fetch responses via responses.flat (JSON) — gives labeled fields.
 
-    Paginates using 'after' timestamp to get all records (max 1000/page).
-    Returns a list of dicts, each with human-readable keys like
-    'Service Line', 'District', 'report number', etc.
+    Pages on the remapped 'Updated Time' until a short page comes back;
+    there is no page cap. KPA returns newest-first, so the cursor walks
+    backward with 'before' (or forward with 'after' if a page comes back
+    oldest-first). Each boundary timestamp is re-requested inclusively
+    and rows are de-duplicated on Report Number, so ties that straddle a
+    page break are never lost.
+
+    With a ``sink`` each page's new records are handed to it as they
+    arrive and nothing is accumulated, so memory stays at one page.
+
+    Returns (records, stats): records are dicts with human-readable keys
+    like 'Service Line', 'District', 'Report Number' (empty when a sink
+    is used); stats is {"form", "pages", "rows", "complete",
+    "updated_max", "fields"}, fields being the header's column labels.
     """
-    all_results = []
-    cursor = after_ms
+    records = []
+    seen = set()
     header = None
+    after, before = after_ms, None
+    stepped_past = False  # already moved strictly past a boundary tie?
+    updated_max = 0
     page = 0
+    complete = False
+
+    # Resume from the last completed page of an interrupted run. In sink
+    # mode the rows are already in the sink, so only their keys are kept.
+    # A form can match more than one store, so checkpoints are per store.
+    after_day = after_ms // DAY_MS
+    checkpoint = Checkpoint(f"kpa_{label}_{form_id}_{after_day}",
+                            [label, form_id, after_day])
+    for entry in checkpoint.load():
+        if sink is None:
+            records.extend(entry["rows"])
+            seen.update(_kpa_record_key(r) for r in entry["rows"])
+        else:
+            seen.update(entry["keys"])
+        page = entry["page"]
+        after, before = entry["after"], entry["before"]
+        stepped_past = entry["stepped_past"]
+        updated_max = entry["updated_max"]
+        header = entry.get("header") or header
+        complete = entry["complete"]
+    if page:
+        log.info(f"    form '{form_name}': resuming after page {page} "
+                 f"({len(seen)} rows)")
 
     try:
-        while True:
-            page += 1
-            data = _kpa_post("responses.flat", {
+        while not complete:
+            payload = {
                 "form_id": form_id,
-                "after": cursor,
-                "limit": 1000,
+                "after": after,
+                "limit": KPA_PAGE_LIMIT,
                 "format": "json",
-            })
+            }
+            if before is not None:
+                payload["before"] = before
+            data = _kpa_post("responses.flat", payload)
             if not data or not data.get("ok"):
                 break
+            page += 1
 
             rows = data.get("responses", [])
-            if len(rows) < 2:
-                break
-
             # First row is always the header
-            if header is None:
+            if header is None and rows:
                 header = rows[0]
             data_rows = rows[1:]
 
+            new_records = []
+            stamps = []
             for row in data_rows:
-                record = {}
-                for field_id, value in row.items():
-                    col_name = header.get(field_id, field_id)
-                    record[col_name] = value
-                all_results.append(record)
-
-            # If we got a full page, advance cursor to latest Updated Time
-            if len(data_rows) >= 1000:
-                # Find the max updated timestamp to use as next cursor
-                max_ts = cursor
-                for row in data_rows:
-                    ut = row.get("updated_time") or row.get("Updated Time")
-                    if ut and isinstance(ut, (int, float)) and ut > max_ts:
-                        max_ts = int(ut)
-                if max_ts > cursor:
-                    cursor = max_ts
+                record = {header.get(fid, fid): value for fid, value in row.items()}
+                key = _kpa_record_key(record)
+                if key not in seen:
+                    seen.add(key)
+                    new_records.append(record)
+                ut = record.get("Updated Time")
+                if isinstance(ut, (int, float)):
+                    stamps.append(int(ut))
+            if stamps:
+                updated_max = max(updated_max, max(stamps))
+
+            if len(data_rows) < KPA_PAGE_LIMIT:
+                complete = True  # last page
+            elif not stamps:
+                log.warning(f"    form '{form_name}': page {page} has no "
+                            "Updated Time — cannot page further")
+                break
+            else:
+                # A page of nothing but already-seen rows means more than
+                # a full page shares the boundary timestamp: step strictly
+                # past it once, and give up if that doesn't help either.
+                strict = not new_records
+                if strict and stepped_past:
+                    log.warning(f"    form '{form_name}': cursor stuck at "
+                                f"page {page} — stopping")
+                    break
+                stepped_past = strict
+                if strict:
+                    log.warning(f"    form '{form_name}': over {KPA_PAGE_LIMIT} "
+                                "rows share one Updated Time — some may be skipped")
+
+                if stamps[0] >= stamps[-1]:  # newest-first: walk backward
+                    before = min(stamps) + (0 if strict else 1)
                 else:
-                    break  # can't advance, stop
+                    after = max(stamps) - (0 if strict else 1)
+
+            entry = {
+                "page": page, "after": after, "before": before,
+                "stepped_past": stepped_past, "updated_max": updated_max,
+                "complete": complete, "header": header,
+            }
+            if sink is None:
+                records.extend(new_records)
+                entry["rows"] = new_records
             else:
-                break  # last page
+                sink(new_records)
+                entry["keys"] = [_kpa_record_key(r) for r in new_records]
+            checkpoint.append(entry)
+    except Exception as e:
+        log.error(f"    form '{form_name}' flat error: {e}")
+
+    stats = {"form": form_name, "pages": page, "rows": len(seen),
+             "complete": complete, "updated_max": updated_max,
+             "fields": list(header.values()) if header else []}
+    log.info(f"    form '{form_name}' → {len(seen)} rows "
+             f"({page} page{'s' if page > 1 else ''})"
+             f"{'' if complete else ' — INCOMPLETE'}")
+    return records, stats
+
+
+# ── Streaming output ──────────────────────────────────────────────────
+
+# "ndjson" or "ndjson.gz": stream KPA pages into an append-only record log
+# at data/kpa_<label>.<ext> instead of merging everything in memory.
+STREAM_OUTPUT = os.getenv("STREAM_OUTPUT", "").strip().lower()
+
+
+class NdjsonLog:
+    """Thread-safe append-only NDJSON record log, gzip if the path ends in .gz.
+
+    Every write is fsynced before returning, so a checkpoint written after
+    it never points past what is on disk. Iterating the log re-reads it
+    from disk, so it can be consumed more than once (JSON, then Parquet).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def write(self, records):
+        if not records:
+            return
+        lines = "".join(json.dumps(r, default=str) + "\n" for r in records)
+        with self._lock, open(self.path, "ab") as raw:
+            if self.path.suffix == ".gz":
+                with gzip.GzipFile(fileobj=raw, mode="ab") as gz:
+                    gz.write(lines.encode("utf-8"))
+            else:
+                raw.write(lines.encode("utf-8"))
+            raw.flush()
+            os.fsync(raw.fileno())
+
+    def __iter__(self):
+        return _iter_ndjson(self.path)
+
+
+def _iter_ndjson(path):
+    """Yield records from an NDJSON log, stopping at a torn last line."""
+    opener = gzip.open if path.suffix == ".gz" else open
+    try:
+        with opener(path, "rt", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    return
+    except EOFError:
+        return  # gzip member cut short by a crash
+
+
+def _compact_ndjson(path, start):
+    """Rewrite a record log with one row per Report Number; return the count.
+
+    Same rules as _merge_kpa (higher Version wins, later rows win a tie,
+    rows before the lookback window dropped), but done in two passes over
+    the file so only a key → (version, line) index is held in memory.
+    """
+    best = {}
+    for i, record in enumerate(_iter_ndjson(path)):
+        key = record.get("Report Number") or ("row", i)
+        version = _version(record)
+        if key not in best or version >= best[key][0]:
+            best[key] = (version, i)
+    keep = {i for _, i in best.values()}
+    del best
+
+    cutoff = start.strftime("%Y-%m-%d")
+    tmp = path.with_name(f".tmp.{path.name}")  # keep .gz suffix
+    tmp.unlink(missing_ok=True)
+    writer = NdjsonLog(tmp)
+    batch = []
+    count = 0
+    for i, record in enumerate(_iter_ndjson(path)):
+        if i in keep and _in_window(record, cutoff):
+            batch.append(record)
+            count += 1
+            if len(batch) >= KPA_PAGE_LIMIT:
+                writer.write(batch)
+                batch = []
+    writer.write(batch)
+    if not tmp.exists():
+        tmp.touch()
+    os.replace(tmp, path)
+    return count
+
+
+# ── KPA incremental store ─────────────────────────────────────────────
+
+STATE_FILE = "fetch_state.json"
+
+
+def _load_state():
+    """Return the persisted per-form "Updated Time" watermarks."""
+    path = DATA_DIR / STATE_FILE
+    if path.exists():
+        try:
+            with open(path) as f:
+                return json.load(f)
+        except Exception as e:
+            log.warning(f"  could not read {STATE_FILE}: {e} — doing a full fetch")
+    return {}
 
-            if page >= 20:  # safety cap
-                break
 
-        if all_results:
-            log.info(f"    form '{form_name}' → {len(all_results)} rows "
-                     f"({page} page{'s' if page > 1 else ''})")
-        return all_results
+def _load_store(label):
+    """Return the records already saved in data/kpa_<label>.json, or None
+    if there is no readable store."""
+    path = DATA_DIR / f"kpa_{label}.json"
+    if not path.exists():
+        return None
+    try:
+        with open(path) as f:
+            return json.load(f).get(label, [])
     except Exception as e:
-        log.error(f"    form '{form_name}' flat error: {e}")
-    return []
+        log.warning(f"  could not read {path.name}: {e} — starting empty")
+        return None
 
 
-# ── KPA incidents ─────────────────────────────────────────────────────
+def _version(record):
+    try:
+        return int(record.get("Version") or 0)
+    except (TypeError, ValueError):
+        return 0
 
-INCIDENT_KEYWORDS = ["incident", "injury", "accident", "report"]
 
-def fetch_kpa_incidents():
-    """Fetch incidents from KPA EHS (last 90 days) with full field data."""
-    if not KPA_API_TOKEN:
-        log.error("KPA_API_TOKEN not set — check .env file")
-        return _empty_kpa("incidents", "No API token configured")
+def _merge_kpa(existing, fresh, start):
+    """Merge fresh KPA rows into the stored ones, keyed by Report Number.
 
+    The higher Version wins (fresh wins a tie). Rows whose Date falls
+    before the lookback window are dropped so the store stays at
+    LOOKBACK_DAYS.
+    """
+    merged = {}
+    unkeyed = []
+    for record in list(existing) + list(fresh):
+        key = record.get("Report Number")
+        if not key:
+            unkeyed.append(record)
+            continue
+        current = merged.get(key)
+        if current is None or _version(record) >= _version(current):
+            merged[key] = record
+
+    cutoff = start.strftime("%Y-%m-%d")
+    return [
+        r for r in list(merged.values()) + unkeyed if _in_window(r, cutoff)
+    ]
+
+
+def _in_window(record, cutoff):
+    """True unless the record's Date is before the YYYY-MM-DD cutoff."""
+    return not isinstance(record.get("Date"), str) or record["Date"][:10] >= cutoff
+
+
+def _kpa_fetch_incremental(label, keywords, state):
+    """Fetch only responses updated since each form's last watermark.
+
+    Watermarks live in data/fetch_state.json, per store and form id, and
+    are advanced in ``state`` (main() saves it after the stores). Delete
+    that file to force a full LOOKBACK_DAYS re-download.
+
+    With STREAM_OUTPUT set, pages go straight into the kpa_<label> record
+    log, which is then compacted on disk; the returned payload carries the
+    NdjsonLog itself, which save_json writes out record by record.
+    """
     now = datetime.now(timezone.utc)
     start = now - timedelta(days=LOOKBACK_DAYS)
-    after_ms = int(start.timestamp() * 1000)
-    all_items = []
-
-    log.info("KPA Incidents: discovering forms …")
-    forms = _kpa_discover_forms()
-    for form in forms:
-        name = (form.get("name") or "").lower()
-        if any(kw in name for kw in INCIDENT_KEYWORDS):
-            items = _kpa_fetch_flat(form["id"], form.get("name", ""), after_ms)
-            all_items.extend(items)
+    window_ms = int(start.timestamp() * 1000)
+
+    sink = None
+    existing = []
+    if STREAM_OUTPUT:
+        log_path = DATA_DIR / f"kpa_{label}.{STREAM_OUTPUT}"
+        record_log = NdjsonLog(log_path)
+        store_path = DATA_DIR / f"kpa_{label}.json"
+        if not log_path.exists() or (
+                store_path.exists()
+                and store_path.stat().st_mtime_ns > log_path.stat().st_mtime_ns):
+            # Seed the log from the JSON store — first run, or a run
+            # without STREAM_OUTPUT has moved the store on since — and
+            # create it even if there was nothing to seed
+            log_path.unlink(missing_ok=True)
+            existing = _load_store(label)
+            record_log.write(existing or [])
+            log_path.touch()
+        sink = record_log.write
+    else:
+        existing = _load_store(label)
+
+    if existing is None:
+        # The watermarks describe rows we no longer have: refetch the window
+        state[f"kpa_{label}"] = {}
+        existing = []
+    watermarks = state.setdefault(f"kpa_{label}", {})
+
+    forms = [
+        form for form in _kpa_discover_forms()
+        if any(kw in (form.get("name") or "").lower() for kw in keywords)
+    ]
+
+    def fetch_form(form):
+        after_ms = max(window_ms, watermarks.get(str(form["id"]), 0))
+        return _kpa_fetch_flat(label, form["id"], form.get("name", ""),
+                               after_ms, sink=sink)
+
+    # map() yields in form order, so the merged output stays deterministic
+    workers = max(1, min(KPA_MAX_WORKERS, len(forms)))
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(fetch_form, forms))
+
+    fresh = []
+    form_stats = []
+    for form, (items, stats) in zip(forms, results):
+        form_id = str(form["id"])
+        fresh.extend(items)
+        form_stats.append(stats)
+        # An incomplete form keeps its old watermark so the gap is re-fetched
+        if stats["complete"] and stats["updated_max"] > watermarks.get(form_id, 0):
+            watermarks[form_id] = stats["updated_max"]
+    new_rows = sum(stats["rows"] for stats in form_stats)
+
+    if sink:
+        count = _compact_ndjson(log_path, start)
+        all_items = record_log
+    else:
+        all_items = _merge_kpa(existing, fresh, start)
+        count = len(all_items)
+    log.info(f"  KPA {label}: {new_rows} new/updated rows, {count} in store")
 
     return {
-        "incidents": all_items,
-        "count": len(all_items),
+        label: all_items,
+        "count": count,
         "fetched_at": datetime.now().isoformat(),
         "period": {"start": start.isoformat(), "end": now.isoformat()},
+        "forms": form_stats,
     }
 
 
+# ── KPA incidents ─────────────────────────────────────────────────────
+
+INCIDENT_KEYWORDS = ["incident", "injury", "accident", "report"]
+
+def fetch_kpa_incidents(state=None):
+    """Fetch incidents from KPA EHS (last 90 days) with full field data."""
+    if not KPA_API_TOKEN:
+        log.error("KPA_API_TOKEN not set — check .env file")
+        return _empty_kpa("incidents", "No API token configured")
+
+    log.info("KPA Incidents: discovering forms …")
+    if state is None:
+        state = _load_state()
+    return _kpa_fetch_incremental("incidents", INCIDENT_KEYWORDS, state)
+
+
 # ── KPA observations ─────────────────────────────────────────────────
 
 OBSERVATION_KEYWORDS = ["observation", "safety", "hazard", "near miss", "behavior"]
 
-def fetch_kpa_observations():
+def fetch_kpa_observations(state=None):
     """Fetch observations from KPA EHS (last 90 days) with full field data."""
     if not KPA_API_TOKEN:
         log.error("KPA_API_TOKEN not set — check .env file")
         return _empty_kpa("observations", "No API token configured")
 
-    now = datetime.now(timezone.utc)
-    start = now - timedelta(days=LOOKBACK_DAYS)
-    after_ms = int(start.timestamp() * 1000)
-    all_items = []
-
     log.info("KPA Observations: discovering forms …")
-    forms = _kpa_discover_forms()
-    for form in forms:
-        name = (form.get("name") or "").lower()
-        if any(kw in name for kw in OBSERVATION_KEYWORDS):
-            items = _kpa_fetch_flat(form["id"], form.get("name", ""), after_ms)
-            all_items.extend(items)
-
-    return {
-        "observations": all_items,
-        "count": len(all_items),
-        "fetched_at": datetime.now().isoformat(),
-        "period": {"start": start.isoformat(), "end": now.isoformat()},
-    }
+    if state is None:
+        state = _load_state()
+    return _kpa_fetch_incremental("observations", OBSERVATION_KEYWORDS, state)
 
 
 def _empty_kpa(label, reason):
@@ -306,10 +743,62 @@ def _empty_kpa(label, reason):
 
 # ── Save & main ───────────────────────────────────────────────────────
 
+def _is_stream(value):
+    return isinstance(value, Iterable) and not isinstance(
+        value, (list, tuple, dict, str, bytes))
+
+
+def _dump_streaming(data, f):
+    """json.dump(data, f, indent=2) that writes streamed values lazily."""
+    f.write("{")
+    for i, (key, value) in enumerate(data.items()):
+        f.write(f"{',' if i else ''}\n  {json.dumps(key)}: ")
+        if not _is_stream(value):
+            f.write(json.dumps(value, indent=2, default=str).replace("\n", "\n  "))
+            continue
+        empty = True
+        for item in value:
+            body = json.dumps(item, indent=2, default=str).replace("\n", "\n    ")
+            f.write(f"{'[' if empty else ','}\n    {body}")
+            empty = False
+        f.write("[]" if empty else "\n  ]")
+    f.write("\n}")
+
+
 def save_json(filename, data):
+    """Write data/<filename> atomically (temp file, then rename over it).
+
+    Streamed values (NdjsonLog record logs) are written one record at a
+    time instead of being materialized first.
+    """
     path = DATA_DIR / filename
-    with open(path, "w") as f:
-        json.dump(data, f, indent=2, default=str)
+    tmp = path.with_name(f".{path.name}.tmp")
+    with open(tmp, "w") as f:
+        if any(_is_stream(v) for v in data.values()):
+            _dump_streaming(data, f)
+        else:
+            json.dump(data, f, indent=2, default=str)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    log.info(f"Saved {path.name}  ({path.stat().st_size:,} bytes)")
+
+
+def save_columnar(filename, data, key, nested=False):
+    """Write the Parquet twin of data/<filename> that the dashboard loads.
+
+    Call after save_json(): the twin records the JSON's sha256, and is
+    only used while that JSON is unchanged.
+    """
+    path = datastore.columnar_path(DATA_DIR / filename)
+    entries = data.get(key) or []
+    if nested:
+        # Motive wraps each event as {"driver_performance_event": {...}}
+        entries = [e.get("driver_performance_event", e) for e in entries]
+    source = build_data.file_hash(DATA_DIR / filename)
+    datastore.write_payload(
+        path, {**data, key: entries, "source_sha256": source}, key,
+        nested=nested)
     log.info(f"Saved {path.name}  ({path.stat().st_size:,} bytes)")
 
 
@@ -321,18 +810,39 @@ def main():
 
     DATA_DIR.mkdir(exist_ok=True)
 
+    state = _load_state()
     motive = fetch_motive_events()
-    incidents = fetch_kpa_incidents()
-    observations = fetch_kpa_observations()
+    incidents = fetch_kpa_incidents(state)
+    observations = fetch_kpa_observations(state)
 
     save_json("motive_events.json", motive)
-    save_json("kpa_incidents.json", incidents)
-    save_json("kpa_observations.json", observations)
+    save_columnar("motive_events.json", motive, "events", nested=True)
+    for label, data in (("incidents", incidents),
+                        ("observations", observations)):
+        filename = f"kpa_{label}.json"
+        if data.get("error") and (DATA_DIR / filename).exists():
+            # An _empty_kpa() stand-in must not replace the stored history
+            log.warning(f"Keeping {filename}: {data['error']}")
+            continue
+        save_json(filename, data)
+        save_columnar(filename, data, label)
+        if isinstance(data[label], NdjsonLog):
+            # Saved from the log, so the log is as current as the store
+            os.utime(data[label].path)
+    build_data.save_tables(DATA_DIR)
+    # Watermarks only advance once the merged stores are on disk
+    save_json(STATE_FILE, state)
+    _clear_checkpoints()
 
     log.info(bar)
     log.info(f"Motive events:     {motive['count']}")
     log.info(f"KPA incidents:     {incidents['count']}")
     log.info(f"KPA observations:  {observations['count']}")
+    for stats in incidents.get("forms", []) + observations.get("forms", []):
+        log.info(f"  {stats['form'][:40]:<40} {stats['pages']:>4} pages "
+                 f"{stats['rows']:>7} rows"
+                 f"{'' if stats['complete'] else '  (incomplete)'}")
+    http_client.close_all()
     log.info("DONE")
     log.info(bar)
 
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+BRHAS Safety Dashboard - Shared HTTP Client
+Pooled keep-alive sessions used by both fetch scripts, so paginated
+Motive and KPA requests reuse warm connections instead of paying a new
+TCP connect and TLS handshake per page.
+
+Every request also goes through a per-host scheduler: 429/5xx responses
+and connection errors are retried with jittered exponential backoff (or
+the server's Retry-After), and the number of in-flight requests adapts
+to throttling AIMD-style, so parallel fetchers settle just under each
+API's real rate limit instead of dropping pages.
+"""
+
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Per-host (connect, read) timeouts in seconds
+HOST_TIMEOUTS = {
+    "api.gomotive.com": (10, 30),
+    "api.kpaehs.com": (10, 30),
+}
+DEFAULT_TIMEOUT = (10, 30)
+
+# Keep-alive connections held open per host (>= fetch worker count)
+POOL_SIZE = 16
+
+# Starting in-flight request limit per host; adapts between 1 and POOL_SIZE
+HOST_CONCURRENCY = {
+    "api.gomotive.com": 4,
+    "api.kpaehs.com": 4,
+}
+DEFAULT_CONCURRENCY = 4
+
+# Retry policy
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+THROTTLE_STATUSES = {429, 503}
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0   # seconds, doubled per attempt
+BACKOFF_CAP = 60.0   # longest single wait
+
+log = logging.getLogger("http_client")
+
+_sessions = {}
+_limiters = {}
+_lock = threading.Lock()
+
+
+class AdaptiveLimiter:
+    """AIMD cap on concurrent requests to one host.
+
+    Each success raises the limit by 1/limit (about +1 per round of
+    requests); each throttle response halves it and pauses the whole
+    host until the server's Retry-After has passed. Other failures
+    (5xx, connection errors) leave the limit where it is.
+    """
+
+    def __init__(self, initial, maximum=POOL_SIZE):
+        self.limit = float(initial)
+        self.maximum = maximum
+        self.in_flight = 0
+        self.resume_at = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self):
+        with self._cond:
+            while True:
+                wait = self.resume_at - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                elif self.in_flight >= int(self.limit):
+                    self._cond.wait()
+                else:
+                    self.in_flight += 1
+                    return
+
+    def release(self, throttled=False, pause=0.0, ok=True):
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(1.0, self.limit / 2)
+                self.resume_at = max(self.resume_at, time.monotonic() + pause)
+            elif ok:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+def get_limiter(host):
+    """Return the shared AdaptiveLimiter for a host, creating it once."""
+    with _lock:
+        limiter = _limiters.get(host)
+        if limiter is None:
+            limiter = AdaptiveLimiter(
+                HOST_CONCURRENCY.get(host, DEFAULT_CONCURRENCY))
+            _limiters[host] = limiter
+        return limiter
+
+
+def _backoff(attempt):
+    """Full-jitter exponential backoff for a 0-based retry attempt."""
+    return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * 2 ** attempt))
+
+
+def _retry_after(resp):
+    """Seconds the server asked us to wait, or None."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return min(BACKOFF_CAP, max(0.0, float(value)))
+    except ValueError:
+        pass
+    try:
+        delay = parsedate_to_datetime(value).timestamp() - time.time()
+        return min(BACKOFF_CAP, max(0.0, delay))
+    except (TypeError, ValueError):
+        return None
+
+
+def get_session(host):
+    """Return the shared pooled Session for a host, creating it once."""
+    with _lock:
+        session = _sessions.get(host)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            session.headers.update({
+                "Accept-Encoding": "gzip, deflate",
+                "Connection": "keep-alive",
+            })
+            _sessions[host] = session
+        return session
+
+
+def request(method, url, **kwargs):
+    """Send a request on the host's pooled session with its default timeout.
+
+    Retries 429/5xx and connection errors up to MAX_RETRIES times. The
+    last response is returned if it still fails, so callers keep their
+    own status handling; the last connection error is re-raised.
+    """
+    host = urlsplit(url).hostname or ""
+    kwargs.setdefault("timeout", HOST_TIMEOUTS.get(host, DEFAULT_TIMEOUT))
+    session = get_session(host)
+    limiter = get_limiter(host)
+
+    for attempt in range(MAX_RETRIES + 1):
+        limiter.acquire()
+        try:
+            resp = session.request(method, url, **kwargs)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            limiter.release(ok=False)
+            if attempt == MAX_RETRIES:
+                raise
+            delay = _backoff(attempt)
+            log.warning(f"  {host}: {e.__class__.__name__} — retry "
+                        f"{attempt + 1}/{MAX_RETRIES} in {delay:.1f}s")
+            time.sleep(delay)
+            continue
+        except BaseException:
+            # Any other failure (cut-off body, redirect loop, ...) still
+            # gives its slot back before propagating
+            limiter.release(ok=False)
+            raise
+
+        if resp.status_code not in RETRY_STATUSES or attempt == MAX_RETRIES:
+            limiter.release(ok=resp.status_code not in RETRY_STATUSES)
+            return resp
+
+        delay = _retry_after(resp)
+        if delay is None:
+            delay = _backoff(attempt)
+        throttled = resp.status_code in THROTTLE_STATUSES
+        limiter.release(throttled=throttled, pause=delay, ok=False)
+        log.warning(f"  {host}: HTTP {resp.status_code} — retry "
+                    f"{attempt + 1}/{MAX_RETRIES} in {delay:.1f}s"
+                    f"{f' (limit now {int(limiter.limit)})' if throttled else ''}")
+        if not throttled:
+            time.sleep(delay)  # throttled waits happen in acquire()
+
+
+def get(url, **kwargs):
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    return request("POST", url, **kwargs)
+
+
+def close_all():
+    """Close every pooled session (call once a fetch run is finished)."""
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
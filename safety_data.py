@@ -0,0 +1,624 @@
+#!/usr/bin/env python3
+"""
+BRHAS Safety Dashboard - Casing Division Data Model
+Yard/district definitions and the normalizers that turn raw Motive and
+KPA payloads into the flat Casing Division records the dashboard shows.
+Shared by the build stage (build_data.py) and the Streamlit app.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+from itertools import accumulate
+
+import numpy as np
+
+# ── Yard definitions ─────────────────────────────────────────────────
+
+YARD_ORDER = ["Midland", "Bryan", "Kilgore", "Hobbs",
+              "Jourdanton", "Levelland", "Barstow"]
+
+YARD_REGIONS = {
+    "Midland":    ["midland", "yukon", "odessa", "west odessa", "stanton",
+                   "big spring", "garden city", "crane", "rankin", "mccamey"],
+    "Bryan":      ["bryan", "college station", "palestine", "madisonville",
+                   "hearne", "navasota", "huntsville"],
+    "Kilgore":    ["kilgore", "tyler", "longview", "henderson", "marshall",
+                   "jacksonville", "carthage", "lufkin", "nacogdoches"],
+    "Hobbs":      ["hobbs", "seminole", "lovington", "carlsbad", "artesia",
+                   "eunice", "jal", "tatum"],
+    "Jourdanton": ["jourdanton", "pleasanton", "floresville", "poteet",
+                   "kenedy", "karnes city", "falls city", "laredo",
+                   "edinburg"],
+    "Levelland":  ["levelland", "lubbock", "brownfield", "post", "lamesa",
+                   "snyder", "tahoka", "slaton", "wolfforth", "littlefield"],
+    "Barstow":    ["barstow", "pecos", "kermit", "monahans", "fort stockton",
+                   "wink", "mentone", "toyah"],
+}
+
+DISTRICT_ALIASES = {"midland yukon": "Midland"}
+CASING_SERVICE_LINES = {"casing"}
+
+CASING_DIVISION = "Casing"
+_CASING_UNIT = re.compile(r"^\d+C(\s|$|-)")
+
+CSG_AUDIT_FORM = "CSG - Safety Casing Field Assessment"
+
+# Rig audit answers: 1 = pass, 2 = fail, anything else isn't scored
+AUDIT_ANSWER_CODES = {"Yes": 1, "OK": 1, "No": 2}
+# Audit form fields that are report metadata, not checklist questions
+AUDIT_META_FIELDS = frozenset({
+    "Report", "Report Number", "Date", "District", "Observer",
+    "Observer Emp#", "Rig", "Audit Type", "Link", "Service Line",
+    "Updated", "Updated Time", "Version", "Latitude", "Longitude",
+    "Temperature", "Wind Speed", "Weather", "Duration (Seconds)",
+    "Parent Report Number", "Parent Link", "Surrogate", "Completed by",
+    "Customer", "Name", "Number of Crew Members Involved",
+    "Date Conducted", "Date Conducted Latitude",
+    "Date Conducted Longitude", "1st Obs", "2nd Obs",
+    "_date", "_district",
+})
+
+# Every yard keyword in one pattern, alternatives in YARD_REGIONS order.
+# The lookahead matches at each position (so overlapping keywords are
+# all seen) and the first alternative to match there is the
+# highest-priority yard, same as checking the yards one by one.
+_YARD_KEYWORDS = [(yard, kw) for yard, kws in YARD_REGIONS.items()
+                  for kw in kws]
+_YARD_PATTERN = re.compile("(?=(?:%s))" % "|".join(
+    f"({re.escape(kw)})" for _, kw in _YARD_KEYWORDS))
+_YARD_RANK = {yard: i for i, yard in enumerate(YARD_REGIONS)}
+
+
+
+# ── Record types ─────────────────────────────────────────────────────
+# Only the fields the dashboard reads. Optional KPA fields are None when
+# the report didn't have them (as opposed to "" when left blank).
+
+@dataclass(frozen=True, slots=True)
+class MotiveEvent:
+    id: object = ""
+    type: str = "unknown"
+    date: date | None = None
+    date_str: str = ""
+    location: str | None = ""
+    yard: str | None = None
+    driver: str = ""
+    vehicle: str = ""
+    start_speed: float | None = None
+    end_speed: float | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class KpaItem:
+    """An incident or observation report."""
+    report_number: str | None = None
+    timestamp: str | None = None      # raw KPA "Date"
+    date: date | None = None
+    district: str | None = ""
+    observer: str | None = None
+    employee: str | None = None
+    incident_type: str | None = None
+    observation_type: str | None = None
+    description: str | None = None
+    location: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class RigAudit:
+    """A CSG - Safety Casing Field Assessment with its checklist score."""
+    report_number: str | None = None
+    timestamp: str | None = None      # raw KPA "Date"
+    date: date | None = None
+    district: str | None = ""
+    rig: str | None = None
+    audit_type: str | None = None
+    observer: str | None = None
+    score: int = 0
+    passed: int = 0
+    failed: int = 0
+    total_checked: int = 0
+    failed_items: tuple = ()
+
+
+def _cat(value):
+    """Intern a categorical string so every record shares one copy."""
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+# ── Field helpers ────────────────────────────────────────────────────
+
+def vehicle_division(vehicle_number):
+    """Return the division a vehicle number belongs to, or None."""
+    if not vehicle_number:
+        return None
+    vn = vehicle_number.strip()
+    if "-RAT-" in vn or _CASING_UNIT.match(vn):
+        return CASING_DIVISION
+    return None
+
+
+def is_casing_vehicle(vehicle_number):
+    """Return True if the vehicle belongs to the Casing division."""
+    return vehicle_division(vehicle_number) == CASING_DIVISION
+
+
+def build_vehicle_registry(motive_raw, known=None):
+    """{vehicle number: division or None} for every unit in motive_raw.
+
+    Units already in ``known`` keep their recorded division; only new
+    ones are classified.
+    """
+    registry = dict(known or {})
+    for entry in (motive_raw or {}).get("events", []):
+        evt = entry.get("driver_performance_event", entry)
+        number = (evt.get("vehicle") or {}).get("number", "")
+        if number and number not in registry:
+            registry[number] = vehicle_division(number)
+    return registry
+
+
+@lru_cache(maxsize=8192)
+def location_to_yard(loc_str):
+    """Map a Motive location string to the nearest casing yard."""
+    if not loc_str:
+        return None
+    best = None
+    for m in _YARD_PATTERN.finditer(loc_str.lower()):
+        yard = _YARD_KEYWORDS[m.lastindex - 1][0]
+        if best is None or _YARD_RANK[yard] < _YARD_RANK[best]:
+            best = yard
+            if _YARD_RANK[yard] == 0:
+                break
+    return best
+
+
+def normalize_district(raw_district):
+    """Combine Midland Yukon / Midland PER into Midland."""
+    if not raw_district:
+        return raw_district
+    key = raw_district.strip().lower()
+    return DISTRICT_ALIASES.get(key, raw_district.strip())
+
+
+def parse_event_date(date_str):
+    """Parse date from various formats. Returns date object or None."""
+    if not date_str:
+        return None
+    try:
+        return datetime.fromisoformat(date_str.replace("Z", "+00:00")).date()
+    except Exception:
+        pass
+    try:
+        return datetime.strptime(date_str[:10], "%Y-%m-%d").date()
+    except Exception:
+        pass
+    return None
+
+
+# Leading YYYY-MM-DD — KPA "Date" ("2025-01-31 14:05:00") and Motive
+# start_time (ISO-8601); the date is always the first ten characters
+_ISO_DAY = re.compile(r"\d{4}-\d{2}-\d{2}")
+
+
+def parse_event_dates(values):
+    """parse_event_date() for a whole column, returning a list.
+
+    The column's format is detected once from its first non-empty value;
+    if it starts with an ISO day every value is read straight off its
+    first ten characters, and only values that don't fit go through
+    parse_event_date().
+    """
+    values = list(values)
+    sample = next((v for v in values if v), None)
+    if not isinstance(sample, str) or not _ISO_DAY.match(sample):
+        return [parse_event_date(v) for v in values]
+    fromisoformat = date.fromisoformat
+    dates = []
+    for v in values:
+        try:
+            dates.append(fromisoformat(v[:10]))
+        except (TypeError, ValueError):
+            dates.append(parse_event_date(v))
+    return dates
+
+
+# ── Record builders (filtered to Casing Division) ────────────────────
+
+def get_all_motive_events(motive_raw, registry=None):
+    """Parse all Casing Division motive events into MotiveEvent records.
+
+    ``registry`` is a build_vehicle_registry() result; units missing
+    from it are classified on the spot.
+    """
+    if not motive_raw:
+        return []
+    registry = build_vehicle_registry(motive_raw, registry)
+    casing = {n for n, division in registry.items()
+              if division == CASING_DIVISION}
+    evts = []
+    for entry in motive_raw.get("events", []):
+        evt = entry.get("driver_performance_event", entry)
+        if (evt.get("vehicle") or {}).get("number", "") in casing:
+            evts.append(evt)
+    dates = parse_event_dates(evt.get("start_time", "") for evt in evts)
+    events = []
+    for evt, evt_date in zip(evts, dates):
+        veh = evt.get("vehicle") or {}
+        drv = evt.get("driver") or {}
+        driver_name = ""
+        if drv.get("first_name"):
+            driver_name = f"{drv['first_name']} {drv.get('last_name', '')}".strip()
+        events.append(MotiveEvent(
+            id=evt.get("id", ""),
+            type=_cat(evt.get("type", "unknown")),
+            date=evt_date,
+            date_str=(evt.get("start_time") or "")[:10],
+            location=evt.get("location", ""),
+            yard=location_to_yard(evt.get("location", "")),
+            driver=_cat(driver_name),
+            vehicle=_cat(veh.get("number", "")),
+            start_speed=evt.get("start_speed"),
+            end_speed=evt.get("end_speed"),
+        ))
+    return events
+
+
+def get_all_kpa_items(raw, key):
+    """Parse all Casing Division KPA items into KpaItem records."""
+    if not raw:
+        return []
+    rows = []
+    for item in raw.get(key, []):
+        sl = (item.get("Service Line") or item.get("service_line") or "").strip().lower()
+        if sl in CASING_SERVICE_LINES:
+            rows.append(item)
+    dates = parse_event_dates(item.get("Date", "") for item in rows)
+    items = []
+    for item, item_date in zip(rows, dates):
+        items.append(KpaItem(
+            report_number=item.get("Report Number"),
+            timestamp=item.get("Date"),
+            date=item_date,
+            district=_cat(normalize_district(item.get("District", ""))),
+            observer=_cat(item.get("Observer")),
+            employee=_cat(item.get("Employee")),
+            incident_type=_cat(item.get("Incident Type")),
+            observation_type=_cat(item.get("Type of Observation")),
+            description=item.get("Description of Observation"),
+            location=item.get("Location / Task"),
+        ))
+    return items
+
+
+def _audit_header(raw):
+    """The CSG form's field labels from the KPA header (the fetch stats
+    under raw["forms"]), or [] if the fetch didn't record them."""
+    return next((stats.get("fields") or []
+                 for stats in (raw or {}).get("forms", [])
+                 if stats.get("form") == CSG_AUDIT_FORM), [])
+
+
+def form_signature(fields):
+    """Identify a form revision by its set of field labels."""
+    text = "\n".join(sorted(set(fields)))
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()[:16]
+
+
+def _add_revision(manifest, fields):
+    """Record the checklist questions among ``fields`` as a form revision
+    (unless it is already known) and return its signature."""
+    questions = [f for f in dict.fromkeys(fields) if f not in AUDIT_META_FIELDS]
+    signature = form_signature(questions)
+    manifest.setdefault(signature, questions)
+    return signature
+
+
+def _audit_revisions(raw, rows, known):
+    """Match each audit row to a form revision.
+
+    A row belongs to the newest revision in ``known`` whose questions
+    (plus AUDIT_META_FIELDS) cover every field it has — a set test on
+    its keys, not a walk over them. Rows that fit none are what's left
+    to walk: their fields together make one new revision. Returns the
+    extended manifest and {signature: [row index]}.
+    """
+    manifest = dict(known or {})
+    header = _audit_header(raw)
+    if header:
+        _add_revision(manifest, header)
+    covers = [(sig, AUDIT_META_FIELDS.union(qs))
+              for sig, qs in reversed(manifest.items())]
+    matched, unmatched = {}, []
+    for i, item in enumerate(rows):
+        keys = item.keys()
+        sig = next((sig for sig, fields in covers if keys <= fields), None)
+        if sig is None:
+            unmatched.append(i)
+        else:
+            matched.setdefault(sig, []).append(i)
+    if unmatched:
+        sig = _add_revision(manifest, (k for i in unmatched for k in rows[i]))
+        matched.setdefault(sig, []).extend(unmatched)
+    return manifest, matched
+
+
+def _audit_rows(raw):
+    return [item for item in (raw or {}).get("observations", [])
+            if item.get("Report") == CSG_AUDIT_FORM]
+
+
+def build_audit_manifest(raw, known=None):
+    """{form signature: [checklist question columns]} for the CSG audit form.
+
+    A form revision is identified by its set of questions
+    (form_signature()). Revisions already in ``known`` are kept; one is
+    added for the KPA header (when the fetch recorded it) and one for
+    the rows no known revision covers.
+    """
+    return _audit_revisions(raw, _audit_rows(raw), known)[0]
+
+
+def _score_audits(rows, questions):
+    """(score, passed, failed, failed_items) per row, coding the answer
+    matrix one question column at a time."""
+    codes = np.zeros((len(rows), len(questions)), dtype=np.int8)
+    for j, question in enumerate(questions):
+        answers = np.fromiter((item.get(question) for item in rows),
+                              dtype=object, count=len(rows))
+        for answer, code in AUDIT_ANSWER_CODES.items():
+            codes[answers == answer, j] = code
+    failing = codes == 2
+    passed = (codes == 1).sum(axis=1)
+    failed = failing.sum(axis=1)
+    total = passed + failed
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = np.where(total > 0, np.round(passed / total * 100), 0)
+    names = np.array(questions, dtype=object)
+    return [(int(scores[i]), int(passed[i]), int(failed[i]),
+             tuple(names[failing[i]]))
+            for i in range(len(rows))]
+
+
+def get_all_rig_audits(raw, manifest=None):
+    """Extract CSG - Safety Casing Field Assessment records from observations.
+
+    These have an empty Service Line so they're missed by the Casing filter.
+    We identify them by the Report field and compute a checklist score from
+    the Yes/OK vs No answers. Each row is scored on the questions of its
+    form revision in ``manifest`` (a build_audit_manifest() result); only
+    rows from a revision it doesn't know have their fields walked.
+    """
+    rows = _audit_rows(raw)
+    if not rows:
+        return []
+    dates = parse_event_dates(item.get("Date", "") for item in rows)
+
+    manifest, matched = _audit_revisions(raw, rows, manifest)
+    scored = [None] * len(rows)
+    for sig, indices in matched.items():
+        group = [rows[i] for i in indices]
+        for i, result in zip(indices, _score_audits(group, manifest[sig])):
+            scored[i] = result
+
+    audits = []
+    for item, item_date, (score, passed, failed, failed_items) in zip(
+            rows, dates, scored):
+        audits.append(RigAudit(
+            report_number=item.get("Report Number"),
+            timestamp=item.get("Date"),
+            date=item_date,
+            district=_cat(normalize_district(item.get("District", ""))),
+            rig=_cat(item.get("Rig")),
+            audit_type=_cat(item.get("Audit Type")),
+            observer=_cat(item.get("Observer")),
+            score=score,
+            passed=passed,
+            failed=failed,
+            total_checked=passed + failed,
+            failed_items=failed_items,
+        ))
+    return audits
+
+
+# ── Shared read-only dataset ─────────────────────────────────────────
+
+class DateIndex:
+    """One table's records, newest first, with a date index per yard.
+
+    Iterating yields every record (undated ones last). between() answers
+    a date range — for all yards or one — with two bisects and a slice.
+    """
+    __slots__ = ("records", "_parts")
+
+    def __init__(self, records, yard_field):
+        # Stable sort: records on the same day keep their source order
+        self.records = tuple(sorted(
+            records, key=lambda r: r.date or date.min, reverse=True))
+        parts = {}
+        for r in self.records:
+            if r.date is None:
+                break
+            yard = getattr(r, yard_field)
+            for key in (None,) if yard is None else (None, yard):
+                keys, recs = parts.setdefault(key, ([], []))
+                keys.append(-r.date.toordinal())
+                recs.append(r)
+        self._parts = {k: (keys, tuple(recs))
+                       for k, (keys, recs) in parts.items()}
+
+    def __iter__(self):
+        return iter(self.records)
+
+    def __len__(self):
+        return len(self.records)
+
+    def between(self, start, end, yard=None):
+        """Records dated start..end (inclusive), optionally for one yard."""
+        part = self._parts.get(yard)
+        if part is None:
+            return ()
+        keys, recs = part
+        lo = bisect_left(keys, -end.toordinal())
+        hi = bisect_right(keys, -start.toordinal())
+        return recs[lo:hi]
+
+
+# Count cube day axis: the 90-day fetch window, plus a margin each side
+CUBE_WINDOW_DAYS = 90
+CUBE_MARGIN_DAYS = 7
+
+# cube source → (Dataset table, yard field, category field)
+CUBE_SOURCES = {
+    "motive": ("motive", "yard", "type"),
+    "drivers": ("motive", "yard", "driver"),
+    "incidents": ("incidents", "district", "incident_type"),
+    "observations": ("observations", "district", "observation_type"),
+    "audits": ("audits", "district", None),
+}
+
+
+class CountCube:
+    """Record counts by (source, yard, category, day) as prefix sums.
+
+    Every (source, yard, category) cell — plus a per-(source, yard) total
+    and the all-yards (yard=None) roll-ups — holds cumulative daily
+    counts over one shared day axis, so any date range is two lookups
+    per cell. Records without a category only count toward the totals.
+
+    The axis covers the fetch window ending at ``until`` (default: the
+    latest record date, capped at today), so a mistyped year in a
+    hand-entered KPA date can't stretch it; records outside the window
+    stay in the tables but aren't counted here.
+    """
+    __slots__ = ("first_day", "days", "_totals", "_cells")
+
+    def __init__(self, tables, until=None):
+        dated = [r.date.toordinal()
+                 for table in {t for t, _, _ in CUBE_SOURCES.values()}
+                 for r in tables[table] if r.date is not None]
+        if until is None and dated:
+            until = min(date.fromordinal(max(dated)), date.today())
+        if until is not None:
+            hi = until.toordinal() + CUBE_MARGIN_DAYS
+            lo = hi - CUBE_WINDOW_DAYS - 2 * CUBE_MARGIN_DAYS
+            dated = [d for d in dated if lo <= d <= hi]
+        self.first_day = min(dated, default=0)
+        self.days = max(dated, default=-1) - self.first_day + 1
+
+        daily_totals, daily_cells = {}, {}
+        for source, (table, yard_field, cat_field) in CUBE_SOURCES.items():
+            for r in tables[table]:
+                if r.date is None:
+                    continue
+                day = r.date.toordinal() - self.first_day
+                if not 0 <= day < self.days:
+                    continue
+                yard = getattr(r, yard_field)
+                cat = getattr(r, cat_field) if cat_field else None
+                for key in (None,) if yard is None else (None, yard):
+                    daily = daily_totals.setdefault(
+                        (source, key), [0] * self.days)
+                    daily[day] += 1
+                    if cat:
+                        daily = daily_cells.setdefault(
+                            (source, key), {}).setdefault(cat, [0] * self.days)
+                        daily[day] += 1
+
+        self._totals = {k: self._prefix(d) for k, d in daily_totals.items()}
+        self._cells = {k: {cat: self._prefix(d) for cat, d in cats.items()}
+                       for k, cats in daily_cells.items()}
+
+    @staticmethod
+    def _prefix(daily):
+        return array("L", accumulate(daily, initial=0))
+
+    def _span(self, start, end):
+        lo = min(max(start.toordinal() - self.first_day, 0), self.days)
+        hi = min(max(end.toordinal() - self.first_day + 1, 0), self.days)
+        return lo, max(lo, hi)
+
+    def count(self, source, start, end, yard=None):
+        """Records dated start..end (inclusive), optionally for one yard."""
+        cum = self._totals.get((source, yard))
+        if cum is None:
+            return 0
+        lo, hi = self._span(start, end)
+        return cum[hi] - cum[lo]
+
+    def counts(self, source, start, end, yard=None):
+        """Counter of category → records in the range (zeros left out)."""
+        lo, hi = self._span(start, end)
+        out = Counter()
+        for cat, cum in self._cells.get((source, yard), {}).items():
+            n = cum[hi] - cum[lo]
+            if n:
+                out[cat] = n
+        return out
+
+    def by_yard(self, source, start, end, yards=YARD_ORDER):
+        """Counter of yard → records in the range (zeros left out)."""
+        out = Counter()
+        for yard in yards:
+            n = self.count(source, start, end, yard)
+            if n:
+                out[yard] = n
+        return out
+
+    def by_day(self, source, start, end, yard=None):
+        """Counter of ISO day → records, oldest day first."""
+        cum = self._totals.get((source, yard))
+        out = Counter()
+        if cum is None:
+            return out
+        lo, hi = self._span(start, end)
+        first = date.fromordinal(self.first_day) if self.days else None
+        for i in range(lo, hi):
+            n = cum[i + 1] - cum[i]
+            if n:
+                out[(first + timedelta(days=i)).isoformat()] = n
+        return out
+
+
+def _fetched_day(fetched_at):
+    """The date of an ISO fetched_at stamp, or None if there isn't one."""
+    try:
+        return date.fromisoformat((fetched_at or "")[:10])
+    except ValueError:
+        return None
+
+
+@dataclass(frozen=True)
+class Dataset:
+    """The normalized tables as one immutable object.
+
+    Each table is a DateIndex of frozen records and ``counts`` is their
+    CountCube, so a single instance can be shared by every dashboard
+    session without copying.
+    """
+    motive: DateIndex
+    incidents: DateIndex
+    observations: DateIndex
+    audits: DateIndex
+    counts: CountCube
+    fetched_at: str = ""
+
+    @classmethod
+    def from_tables(cls, tables):
+        """Index a build_data.load_tables() result."""
+        return cls(
+            motive=DateIndex(tables["motive"], "yard"),
+            incidents=DateIndex(tables["incidents"], "district"),
+            observations=DateIndex(tables["observations"], "district"),
+            audits=DateIndex(tables["audits"], "district"),
+            counts=CountCube(tables, _fetched_day(tables.get("fetched_at"))),
+            fetched_at=tables.get("fetched_at") or "",
+        )
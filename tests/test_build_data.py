@@ -0,0 +1,116 @@
+import json
+from datetime import date
+
+import build_data
+import datastore
+from safety_data import (
+    CSG_AUDIT_FORM, Dataset, build_audit_manifest, get_all_rig_audits,
+)
+
+
+def _write_json(path, incidents):
+    path.write_text(json.dumps({"incidents": incidents, "fetched_at": "x"}))
+
+
+def test_stale_twin_is_ignored(tmp_path):
+    # A JSON rewritten without its Parquet twin (fetch_data.py) must win,
+    # and must change the fingerprint
+    path = tmp_path / "kpa_incidents.json"
+    rows = [{"Report Number": str(i), "Service Line": "Casing"}
+            for i in range(9)]
+    _write_json(path, rows)
+    datastore.write_payload(
+        datastore.columnar_path(path),
+        {"incidents": rows, "source_sha256": build_data.file_hash(path)},
+        "incidents")
+    assert build_data._raw_path(tmp_path, path.name).suffix == ".parquet"
+    before = build_data.data_fingerprint(tmp_path)
+
+    _write_json(path, rows[:3])
+
+    assert build_data._raw_path(tmp_path, path.name) == path
+    assert build_data.data_fingerprint(tmp_path) != before
+    assert len(build_data.load_raw(tmp_path, path.name)["incidents"]) == 3
+
+
+def _audit(number, **answers):
+    return {"Report": CSG_AUDIT_FORM, "Report Number": number,
+            "Date": "2026-10-01 08:00:00", "Version": 1, **answers}
+
+
+def test_audit_scoring_counts_questions_outside_manifest(tmp_path):
+    header = ["Report", "Report Number", "Date", "Version", "Q1", "Q2"]
+    raw = {"observations": [_audit("A", Q1="Yes", Q2="Yes")],
+           "forms": [{"form": CSG_AUDIT_FORM, "fields": header}]}
+    manifest = build_audit_manifest(raw)
+
+    # Same report revision number, but a question the manifest never saw
+    raw["observations"] = [_audit("B", Q1="Yes", Q2="No", Q3="No")]
+    (audit,) = get_all_rig_audits(raw, manifest)
+
+    assert (audit.passed, audit.failed, audit.score) == (1, 2, 33)
+    assert audit.failed_items == ("Q2", "Q3")
+
+
+
+def test_audit_manifest_built_from_rows_without_header():
+    # fetch_data.py records no KPA header: the revision comes from the rows,
+    # and later rows that fit it (unanswered questions left out) reuse it
+    raw = {"observations": [_audit("A", Q1="Yes", Q2="No"),
+                            _audit("B", Q1="No")]}
+    manifest = build_audit_manifest(raw)
+    assert list(manifest.values()) == [["Q1", "Q2"]]
+    assert build_audit_manifest(raw, manifest) == manifest
+
+    a, b = get_all_rig_audits(raw, manifest)
+    assert (a.passed, a.failed, a.failed_items) == (1, 1, ("Q2",))
+    assert (b.passed, b.failed, b.failed_items) == (0, 1, ("Q1",))
+
+def test_load_tables_writes_no_lookups(tmp_path):
+    (tmp_path / "motive_events.json").write_text(json.dumps({"events": [
+        {"id": 1, "type": "speeding", "start_time": "2026-10-01T10:00:00Z",
+         "vehicle": {"number": "12C"}}]}))
+    (tmp_path / "kpa_observations.json").write_text(json.dumps({
+        "observations": [_audit("A", Q1="No")],
+        "forms": [{"form": CSG_AUDIT_FORM,
+                   "fields": ["Report", "Q1"]}]}))
+
+    tables = build_data.load_tables(tmp_path)
+
+    assert len(tables["motive"]) == len(tables["audits"]) == 1
+    assert not (tmp_path / build_data.VEHICLES_FILE).exists()
+    assert not (tmp_path / build_data.AUDIT_MANIFEST_FILE).exists()
+
+    build_data.save_tables(tmp_path)
+    assert (tmp_path / build_data.VEHICLES_FILE).exists()
+    assert (tmp_path / build_data.AUDIT_MANIFEST_FILE).exists()
+
+
+def test_dataset_from_loaded_tables(tmp_path):
+    (tmp_path / "kpa_incidents.json").write_text(json.dumps({
+        "incidents": [{"Report Number": "1", "Service Line": "Casing",
+                       "Date": "2026-10-01 08:00:00", "District": "Hobbs",
+                       "Incident Type": "Spill"}],
+        "fetched_at": "2026-10-02T06:00:00"}))
+
+    dataset = Dataset.from_tables(build_data.load_tables(tmp_path))
+
+    assert dataset.fetched_at == "2026-10-02T06:00:00"
+    assert dataset.counts.count("incidents", dataset.incidents.records[0].date,
+                                dataset.incidents.records[0].date) == 1
+
+
+def test_count_cube_ignores_dates_outside_the_window(tmp_path):
+    rows = [{"Report Number": str(i), "Service Line": "Casing",
+             "Date": f"2026-09-{i + 1:02d} 08:00:00"} for i in range(20)]
+    rows.append({"Report Number": "typo", "Service Line": "Casing",
+                 "Date": "1026-09-01 08:00:00"})
+    (tmp_path / "kpa_incidents.json").write_text(json.dumps({
+        "incidents": rows, "fetched_at": "2026-10-02T06:00:00"}))
+
+    dataset = Dataset.from_tables(build_data.load_tables(tmp_path))
+
+    assert len(dataset.incidents) == 21
+    assert dataset.counts.days == 20
+    assert dataset.counts.count("incidents", date(1000, 1, 1),
+                                date(2026, 12, 31)) == 20
@@ -0,0 +1,110 @@
+import json
+import os
+from datetime import datetime
+
+import fetch_live_data
+
+
+def test_stream_log_created_when_no_rows(tmp_path, monkeypatch):
+    # No JSON store to seed from and no forms → the record log must still
+    # exist so compaction and saving don't hit FileNotFoundError
+    monkeypatch.setattr(fetch_live_data, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(fetch_live_data, "STREAM_OUTPUT", "ndjson")
+    monkeypatch.setattr(fetch_live_data, "_kpa_discover_forms", lambda: [])
+
+    payload = fetch_live_data._kpa_fetch_incremental("incidents", ["incident"], {})
+
+    assert (tmp_path / "kpa_incidents.ndjson").exists()
+    assert payload["count"] == 0
+    assert list(payload["incidents"]) == []
+
+
+def _fake_kpa(calls):
+    header = {"f1": "Report Number", "f2": "Updated Time", "f3": "Q1"}
+    rows = [{"f1": "R1", "f2": 2000, "f3": "Yes"},
+            {"f1": "R2", "f2": 1000, "f3": "No"}]
+
+    def post(method, payload=None):
+        calls.append(method)
+        return {"ok": True, "responses": [header] + rows}
+    return post
+
+
+def test_checkpoints_scoped_per_store(tmp_path, monkeypatch):
+    # A form matching both stores must be fetched for each of them, and a
+    # resumed form must still report its header fields
+    calls = []
+    monkeypatch.setattr(fetch_live_data, "CHECKPOINT_DIR", tmp_path)
+    monkeypatch.setattr(fetch_live_data, "_kpa_post", _fake_kpa(calls))
+
+    inc, _ = fetch_live_data._kpa_fetch_flat("incidents", 7, "Near Miss Report", 0)
+    obs, _ = fetch_live_data._kpa_fetch_flat("observations", 7, "Near Miss Report", 0)
+    assert len(calls) == 2
+    assert len(inc) == len(obs) == 2
+
+    resumed, stats = fetch_live_data._kpa_fetch_flat(
+        "incidents", 7, "Near Miss Report", 0)
+    assert len(calls) == 2
+    assert len(resumed) == 2
+    assert stats["fields"] == ["Report Number", "Updated Time", "Q1"]
+
+
+def test_unreadable_store_resets_watermarks(tmp_path, monkeypatch):
+    # Without the stored rows, fetching from the old watermark would
+    # rewrite the store with only the newest ones
+    afters = []
+    monkeypatch.setattr(fetch_live_data, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(fetch_live_data, "STREAM_OUTPUT", "")
+    monkeypatch.setattr(fetch_live_data, "_kpa_discover_forms",
+                        lambda: [{"id": 7, "name": "Incident Report"}])
+
+    def fetch_flat(label, form_id, form_name, after_ms, sink=None):
+        afters.append(after_ms)
+        return [], {"form": form_name, "rows": 0, "pages": 0,
+                    "complete": True, "updated_max": 0}
+    monkeypatch.setattr(fetch_live_data, "_kpa_fetch_flat", fetch_flat)
+    (tmp_path / "kpa_incidents.json").write_text("{not json")
+    state = {"kpa_incidents": {"7": 2 ** 50}}
+
+    fetch_live_data._kpa_fetch_incremental("incidents", ["incident"], state)
+
+    assert afters[0] < 2 ** 50
+    assert state["kpa_incidents"] == {}
+
+
+def test_motive_page_error_keeps_fetched_pages(tmp_path, monkeypatch):
+    per_page = fetch_live_data.MOTIVE_PER_PAGE
+    monkeypatch.setattr(fetch_live_data, "CHECKPOINT_DIR", tmp_path)
+
+    def page(headers, start, end, page_no):
+        if page_no == 5:
+            raise ConnectionError("connection reset")
+        events = [{"driver_performance_event": {"id": page_no * per_page + i}}
+                  for i in range(per_page)]
+        return {"driver_performance_events": events,
+                "pagination": {"total": 5 * per_page}}
+    monkeypatch.setattr(fetch_live_data, "_motive_v2_page", page)
+
+    events = fetch_live_data._motive_v2_events(
+        {}, datetime(2026, 7, 1), datetime(2026, 10, 1))
+
+    assert len(events) == 4 * per_page
+
+
+def test_stream_log_reseeded_after_json_only_run(tmp_path, monkeypatch):
+    # A run without STREAM_OUTPUT moved the JSON store (and watermarks)
+    # past the log: the log must not be reused
+    monkeypatch.setattr(fetch_live_data, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(fetch_live_data, "STREAM_OUTPUT", "ndjson")
+    monkeypatch.setattr(fetch_live_data, "_kpa_discover_forms", lambda: [])
+    log_path = tmp_path / "kpa_incidents.ndjson"
+    log_path.write_text('{"Report Number": "old"}\n')
+    store = tmp_path / "kpa_incidents.json"
+    store.write_text(json.dumps({"incidents": [
+        {"Report Number": "old"}, {"Report Number": "new"}]}))
+    os.utime(log_path, ns=(0, 0))
+
+    payload = fetch_live_data._kpa_fetch_incremental("incidents", ["incident"], {})
+
+    assert sorted(r["Report Number"] for r in payload["incidents"]) == [
+        "new", "old"]